@@ -1,10 +1,14 @@
 import streamlit as st
 import google.generativeai as genai
 import os
-import PyPDF2 as pdf
+import sys
 from dotenv import load_dotenv
 import json
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.pdf_extraction import iter_pdf_pages
+from common.tracing import count_tokens, span, usage_attributes
+
 # Load environment variables
 load_dotenv()
 
@@ -14,16 +18,19 @@ genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 # Function to get response from Gemini model
 def get_gemini_response(input_text):
     model = genai.GenerativeModel('gemini-pro')
-    response = model.generate_content(input_text)
+    with span("llm", model="gemini-pro") as current:
+        response = model.generate_content(input_text)
+        current.set(**usage_attributes(response))
     return response.text
 
 # Function to extract text from uploaded PDF
 def input_pdf_text(uploaded_file):
-    reader = pdf.PdfReader(uploaded_file)
-    text = ""
-    for page in range(len(reader.pages)):
-        page = reader.pages[page]
-        text += str(page.extract_text())
+    # Resumes are short, so extract in-process instead of starting a worker pool
+    with span("extract") as current:
+        data = uploaded_file.getvalue()
+        pages = iter_pdf_pages([(uploaded_file.name, data)], max_workers=0)
+        text = "".join(page_text for _, _, page_text in pages)
+        current.set(bytes=len(data), chars=len(text), tokens=count_tokens(text))
     return text
 
 # Define a prompt template for ATS evaluation
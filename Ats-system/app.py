@@ -1,12 +1,13 @@
 from dotenv import load_dotenv
-import base64
 import streamlit as st
 import os
-import io
-from PIL import Image
-import pdf2image
+import sys
 import google.generativeai as genai
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.pdf_raster import PageRasterizer
+from common.tracing import span, usage_attributes
+
 # Load environment variables from a .env file
 load_dotenv()
 
@@ -16,33 +17,30 @@ genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 # Define the function to get response from Gemini model
 def get_gemini_response(input_text, pdf_content, prompt):
     model = genai.GenerativeModel('gemini-1.5-flash')
-    response = model.generate_content([input_text, pdf_content[0], prompt])
+    with span("llm", model="gemini-1.5-flash", bytes=sum(len(page["data"]) for page in pdf_content)) as current:
+        response = model.generate_content([input_text, *pdf_content, prompt])
+        current.set(**usage_attributes(response))
     return response.text
 
+@st.cache_resource
+def get_rasterizer():
+    # Poppler folder from POPPLER_PATH (or C:\poppler\bin if it exists), DPI, page limit and grayscale from ATS_PDF_*
+    return PageRasterizer.from_env()
+
+# Render the first pages of a resume to JPEG once per file; both buttons reuse the result
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_resume(pdf):
+    with span("extract", bytes=len(pdf)) as current:
+        pages = get_rasterizer().render(pdf)
+        current.set(pages=len(pages), output_bytes=sum(len(page) for page in pages))
+    return pages
+
 # Function to convert uploaded PDF to images (fix for Poppler)
 def input_pdf_setup(uploaded_file):
     if uploaded_file is not None:
         try:
-            # Specify Poppler path if not in system PATH (optional, only if needed)
-            poppler_path = r"C:\poppler\bin"  # Update this path if necessary
-
-            # Convert the PDF to image
-            images = pdf2image.convert_from_bytes(uploaded_file.read(), poppler_path=poppler_path)
-
-            first_page = images[0]
-
-            # Convert to bytes
-            img_byte_arr = io.BytesIO()
-            first_page.save(img_byte_arr, format='JPEG')
-            img_byte_arr = img_byte_arr.getvalue()
-
-            pdf_parts = [
-                {
-                    "mime_type": "image/jpeg",
-                    "data": base64.b64encode(img_byte_arr).decode()  # encode to base64
-                }
-            ]
-            return pdf_parts
+            # Gemini takes the raw JPEG bytes, one part per page
+            return [{"mime_type": "image/jpeg", "data": page} for page in render_resume(uploaded_file.getvalue())]
         except Exception as e:
             st.error(f"Error processing PDF: {e}")
             return None
@@ -1,9 +1,13 @@
 import streamlit as st
 import os
+import sys
 from dotenv import load_dotenv
 import google.generativeai as genai
 from PIL import Image
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.tracing import span, usage_attributes
+
 # Load environment variables
 load_dotenv()
 
@@ -14,7 +18,9 @@ genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 def get_gemini_response(input_text, image, prompt):
     try:
         model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content([input_text, image[0], prompt])
+        with span("llm", model="gemini-1.5-flash", bytes=len(image[0]["data"])) as current:
+            response = model.generate_content([input_text, image[0], prompt])
+            current.set(**usage_attributes(response))
         return response.text
     except Exception as e:
         st.error(f"An error occurred while getting the response: {str(e)}")
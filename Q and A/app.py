@@ -1,8 +1,12 @@
 from dotenv import load_dotenv
 import streamlit as st
 import os
+import sys
 import google.generativeai as genai
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.tracing import traced_stream
+
 # Load environment variables
 load_dotenv()
 
@@ -15,8 +19,8 @@ chat = model.start_chat(history=[])
 
 # Function to get a response from Gemini Pro model
 def get_gemini_response(question):
-    response = chat.send_message(question, stream=True)
-    return response
+    # Timed as an "llm" span, with the first chunk as time to first token
+    return traced_stream("llm", lambda: chat.send_message(question, stream=True))
 
 # Initialize the Streamlit app configuration
 st.set_page_config(page_title="Q&A Demo", layout="wide")
@@ -0,0 +1,133 @@
+"""
+Measure `python sql.py load` throughput and memory against inserting the same rows the way main() used to.
+
+    python benchmarks/bulk_load.py --rows 1000000 --formats csv jsonl parquet
+
+N generated colleges (unique names, a few BTech and Diploma courses each) are
+written to a temporary file in each format. Each variant then loads it into a
+fresh database with the catalog tables and indexes from sql.py in a child
+process, so its peak RSS is measured on its own:
+
+* baseline: the whole file read into a list, one `insert_records` call with
+  the indexes in place, then a commit, as `main()` does with its records
+* bulk: `bulk_load`, streaming batches with load-time PRAGMAs and the
+  indexes dropped and rebuilt
+
+Catalog rebuilding is skipped in both so only loading is compared. Results
+are printed as JSON lines.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "sql-app")]
+
+from sql import LOAD_COLUMNS, bulk_load, create_course_tables, create_table, insert_records, read_records
+
+COURSES = [
+    "Computer Science", "Mechanical Engineering", "Civil Engineering", "Electrical Engineering",
+    "Information Technology", "Electronics and Communication", "Chemical Engineering", "Robotics",
+]
+
+
+def make_records(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        btech = ", ".join(sorted(set(rng.choices(COURSES, k=rng.randint(1, 3)))))
+        diploma = ", ".join(sorted(set(rng.choices(COURSES, k=rng.randint(1, 2)))))
+        yield (f"College {rng.getrandbits(48):012x} {i}", f"BTech: {btech}; Diploma: {diploma}",
+               round(rng.uniform(2.5, 5.0), 1), rng.randrange(10000, 400000))
+
+
+def write_file(path, fmt, count):
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(LOAD_COLUMNS)
+            writer.writerows(make_records(count))
+    elif fmt == "jsonl":
+        with open(path, "w", encoding="utf-8") as f:
+            for record in make_records(count):
+                f.write(json.dumps(dict(zip(LOAD_COLUMNS, record))) + "\n")
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        records = make_records(count)
+        schema = pa.schema([("name", pa.string()), ("courses", pa.string()), ("rating", pa.float64()), ("fee", pa.int64())])
+        with pq.ParquetWriter(path, schema) as writer:
+            while True:
+                chunk = [record for _, record in zip(range(100000), records)]
+                if not chunk:
+                    break
+                writer.write_table(pa.Table.from_pylist([dict(zip(LOAD_COLUMNS, record)) for record in chunk], schema))
+
+
+def run_variant(variant, path, db):
+    import sqlite3
+
+    conn = sqlite3.connect(db)
+    cursor = conn.cursor()
+    create_table(cursor)
+    create_course_tables(cursor)
+    conn.commit()
+    start = time.perf_counter()
+    if variant == "baseline":
+        records = list(read_records(path))
+        insert_records(cursor, records)
+        conn.commit()
+        rows = len(records)
+    else:
+        rows = bulk_load(conn, [path], rebuild_catalog=False)["rows_read"]
+    seconds = time.perf_counter() - start
+    count = conn.execute("SELECT COUNT(*) FROM COLLEGES").fetchone()[0]
+    conn.close()
+    return {
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(rows / seconds),
+        "rows_in_table": count,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--formats", nargs="+", choices=["csv", "jsonl", "parquet"], default=["csv", "jsonl", "parquet"])
+    parser.add_argument("--variants", nargs="+", choices=["baseline", "bulk"], default=["baseline", "bulk"])
+    parser.add_argument("--child", nargs=3, metavar=("VARIANT", "FILE", "DB"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # Bulk load progress lines go to stderr so stdout carries only the result
+        stdout, sys.stdout = sys.stdout, sys.stderr
+        result = run_variant(*args.child)
+        print(json.dumps(result), file=stdout)
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        for fmt in args.formats:
+            path = os.path.join(folder, f"colleges.{fmt}")
+            write_file(path, fmt, args.rows)
+            for variant in args.variants:
+                db = os.path.join(folder, f"{variant}-{fmt}.db")
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", variant, path, db],
+                    check=True, stdout=subprocess.PIPE, text=True,
+                ).stdout
+                result = {"rows": args.rows, "format": fmt, "variant": variant, "file_bytes": os.path.getsize(path)}
+                result.update(json.loads(output))
+                print(json.dumps(result), flush=True)
+                os.remove(db)
+
+
+if __name__ == "__main__":
+    main()
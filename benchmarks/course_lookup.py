@@ -0,0 +1,140 @@
+"""
+Compare course lookups on the free-text COLLEGES.courses column with the normalized catalog built by sql.py.
+
+    python benchmarks/course_lookup.py --colleges 1000000 --repeats 5
+
+A database of N colleges is generated through sql.py's own functions
+(`create_table`, `insert_records`, `create_course_tables`,
+`populate_course_tables`); each college offers a few BTech and Diploma courses
+drawn from a skewed catalog, so common and rare courses are both measured.
+Three query shapes are timed, each written the way the old prompt (LIKE over
+`courses`) and the new prompt (college_courses with the course_names FTS5
+index) produce it:
+
+* count: how many colleges offer a course
+* cheapest: the cheapest college offering a course
+* level: colleges offering a course at a given degree level (first 10)
+
+Both variants must return the same answer. Results are printed as JSON lines.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "sql-app")]
+
+from sql import create_course_tables, create_table, insert_records, populate_course_tables
+
+COURSES = [
+    "Computer Science", "Mechanical Engineering", "Civil Engineering", "Electrical Engineering",
+    "Information Technology", "Electronics and Communication", "Chemical Engineering", "Software Engineering",
+    "Aerospace Engineering", "Robotics", "Network Security", "Data Science", "Biotechnology", "Mining Engineering",
+    "Marine Engineering", "Textile Engineering", "Agricultural Engineering", "Nuclear Engineering",
+    "Petroleum Engineering", "Instrumentation Engineering", "Metallurgical Engineering", "Food Technology",
+    "Industrial Design", "Geoinformatics",
+]
+
+QUERIES = {
+    "count": (
+        "SELECT COUNT(*) FROM COLLEGES WHERE courses LIKE '%{course}%'",
+        "SELECT COUNT(DISTINCT cc.college) FROM course_names n JOIN college_courses cc ON cc.course = n.course "
+        "WHERE course_names MATCH '\"{course}\"'",
+    ),
+    "cheapest": (
+        "SELECT name FROM COLLEGES WHERE courses LIKE '%{course}%' ORDER BY fee ASC, name LIMIT 1",
+        "SELECT c.name FROM course_names n JOIN college_courses cc ON cc.course = n.course "
+        "JOIN COLLEGES c ON c.name = cc.college WHERE course_names MATCH '\"{course}\"' ORDER BY c.fee ASC, c.name LIMIT 1",
+    ),
+    "level": (
+        "SELECT name FROM COLLEGES WHERE courses LIKE '%Diploma:%{course}%' ORDER BY name LIMIT 10",
+        "SELECT college FROM college_courses WHERE course = '{course}' AND level = 'Diploma' ORDER BY college LIMIT 10",
+    ),
+}
+
+
+def make_records(count, seed=0):
+    rng = random.Random(seed)
+    # Zipf-like popularity: the first courses in the catalog are offered far more often
+    weights = [1 / (rank + 1) for rank in range(len(COURSES))]
+    for i in range(count):
+        btech = set(rng.choices(COURSES, weights, k=rng.randint(1, 3)))
+        diploma = set(rng.choices(COURSES, weights, k=rng.randint(1, 2)))
+        courses = f"BTech: {', '.join(sorted(btech))}; Diploma: {', '.join(sorted(diploma))}"
+        yield (f"College {i:07d}", courses, round(rng.uniform(2.5, 5.0), 1), rng.randrange(10000, 400000))
+
+
+def build_database(path, count):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    cursor = conn.cursor()
+    create_table(cursor)
+    records = make_records(count)
+    while True:
+        batch = [record for _, record in zip(range(100000), records)]
+        if not batch:
+            break
+        insert_records(cursor, batch)
+    start = time.perf_counter()
+    create_course_tables(cursor)
+    populate_course_tables(cursor)
+    conn.commit()
+    catalog_seconds = time.perf_counter() - start
+    conn.execute("ANALYZE")
+    conn.close()
+    return catalog_seconds
+
+
+def timed(conn, sql, repeats):
+    samples, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = conn.execute(sql).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return result, samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--colleges", type=int, default=1000000)
+    parser.add_argument("--courses", nargs="+", default=["Computer Science", "Robotics", "Geoinformatics"])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "college.db")
+        start = time.perf_counter()
+        catalog_seconds = build_database(path, args.colleges)
+        print(json.dumps({
+            "colleges": args.colleges,
+            "build_seconds": round(time.perf_counter() - start, 1),
+            "catalog_seconds": round(catalog_seconds, 1),
+            "db_bytes": os.path.getsize(path),
+        }), flush=True)
+
+        conn = sqlite3.connect(path)
+        for course in args.courses:
+            for shape, (like_sql, catalog_sql) in QUERIES.items():
+                like_rows, like_ms = timed(conn, like_sql.format(course=course), args.repeats)
+                catalog_rows, catalog_ms = timed(conn, catalog_sql.format(course=course), args.repeats)
+                print(json.dumps({
+                    "colleges": args.colleges,
+                    "course": course,
+                    "query": shape,
+                    "like_ms": round(like_ms, 3),
+                    "catalog_ms": round(catalog_ms, 3),
+                    "speedup": round(like_ms / catalog_ms, 1) if catalog_ms else None,
+                    "same_result": like_rows == catalog_rows,
+                }), flush=True)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare serial embedding against BatchEmbeddings using the offline FakeEmbeddings.
+
+    python benchmarks/embedding_throughput.py --chunks 2000 --latency 0.05
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.embedding_engine import BatchEmbeddings, FakeEmbeddings
+
+
+def make_chunks(count):
+    return [f"chunk {i} about course fees, ratings and admissions number {i % 97}" for i in range(count)]
+
+
+def run_serial(chunks, latency):
+    embeddings = FakeEmbeddings(latency=latency)
+    start = time.perf_counter()
+    for chunk in chunks:
+        embeddings.embed_documents([chunk])
+    return time.perf_counter() - start, embeddings.calls
+
+
+def run_batched(chunks, latency, batch_size, workers, rps):
+    inner = FakeEmbeddings(latency=latency)
+    embeddings = BatchEmbeddings(inner, batch_size=batch_size, max_workers=workers, requests_per_second=rps)
+    start = time.perf_counter()
+    embeddings.embed_documents(chunks)
+    return time.perf_counter() - start, inner.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per provider call")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 100])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--rps", type=float, default=None, help="provider request quota per second")
+    parser.add_argument("--skip-serial", action="store_true")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+    results = []
+    if not args.skip_serial:
+        seconds, calls = run_serial(chunks, args.latency)
+        results.append({"mode": "serial", "seconds": seconds, "calls": calls, "chunks_per_sec": len(chunks) / seconds})
+    for batch_size in args.batch_sizes:
+        for workers in args.workers:
+            seconds, calls = run_batched(chunks, args.latency, batch_size, workers, args.rps)
+            results.append({
+                "mode": "batched",
+                "batch_size": batch_size,
+                "workers": workers,
+                "seconds": seconds,
+                "calls": calls,
+                "chunks_per_sec": len(chunks) / seconds,
+            })
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Measure the per-rerun overhead of the groq apps outside the LLM call, before and after caching.
+
+    python benchmarks/groq_rerun_overhead.py --reruns 200 --turns 10 100 500
+
+Two costs are timed:
+
+* chain: building ChatGroq, the prompt, the stuff-documents chain, the retriever
+  and the retrieval chain on every rerun (before) versus fetching them from
+  `st.cache_resource` keyed by (index version, model, template) (after). No
+  request is sent to Groq; a dummy API key is enough to construct the client.
+* history: a full Streamlit rerun, through `streamlit.testing`, of a script
+  that renders a chat history of N turns with one `st.write` per line (before)
+  versus `ChatHistory.render` (after).
+
+Results are printed as JSON lines.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "groq")]
+
+import streamlit as st
+from langchain_community.vectorstores import FAISS
+from langchain_groq import ChatGroq
+from streamlit.testing.v1 import AppTest
+
+from chains import build_retrieval_chain
+from common.embedding_engine import FakeEmbeddings
+
+MODEL_NAME = "Llama3-8b-8192"
+TEMPLATE = """
+Answer the questions based on the provided context only.
+<context>
+{context}
+<context>
+Questions:{input}
+"""
+
+
+def timed(func, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "ms_p50": round(samples[len(samples) // 2], 4),
+        "ms_mean": round(statistics.mean(samples), 4),
+    }
+
+
+def bench_chain(reruns):
+    store = FAISS.from_texts([f"chunk {i}" for i in range(100)], FakeEmbeddings(size=64))
+
+    def before():
+        llm = ChatGroq(groq_api_key="benchmark", model_name=MODEL_NAME)
+        build_retrieval_chain(llm, TEMPLATE, store)
+
+    @st.cache_resource
+    def get_llm(model_name):
+        return ChatGroq(groq_api_key="benchmark", model_name=model_name)
+
+    @st.cache_resource(max_entries=4)
+    def get_retrieval_chain(index_version, model_name, template, _vectors):
+        return build_retrieval_chain(get_llm(model_name), template, _vectors)
+
+    def after():
+        get_retrieval_chain(1, MODEL_NAME, TEMPLATE, store)
+
+    after()
+    return [
+        {"cost": "chain", "variant": "before", **timed(before, reruns)},
+        {"cost": "chain", "variant": "after", **timed(after, reruns)},
+    ]
+
+
+def history_before(turns):
+    import streamlit as st
+
+    if "history" not in st.session_state:
+        st.session_state.history = [{"user": f"question {i}", "bot": f"answer {i} " * 40} for i in range(turns)]
+    for chat in st.session_state.history:
+        st.write(f"You: {chat['user']}")
+        st.write(f"Bot: {chat['bot']}")
+
+
+def history_after(turns, groq_dir):
+    import sys
+
+    import streamlit as st
+
+    sys.path.insert(0, groq_dir)
+    from chat_history import ChatHistory
+
+    if "history" not in st.session_state:
+        st.session_state.history = ChatHistory()
+        for i in range(turns):
+            st.session_state.history.append(f"question {i}", f"answer {i} " * 40)
+    st.session_state.history.render()
+
+
+def bench_history(turns, reruns):
+    results = []
+    for variant, app in (
+        ("before", AppTest.from_function(history_before, args=(turns,), default_timeout=60)),
+        ("after", AppTest.from_function(history_after, args=(turns, os.path.join(ROOT, "groq")), default_timeout=60)),
+    ):
+        app.run()
+        results.append({"cost": "history", "variant": variant, "turns": turns, **timed(app.run, reruns)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=200)
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    for result in bench_chain(args.reruns):
+        print(json.dumps(result))
+    for turns in args.turns:
+        for result in bench_history(turns, max(5, args.reruns // 10)):
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
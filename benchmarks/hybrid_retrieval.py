@@ -0,0 +1,137 @@
+"""
+Benchmark the BM25 lexical index and hybrid retrieval at up to a million chunks.
+
+    python benchmarks/hybrid_retrieval.py --sizes 10000 100000 1000000
+
+For each size a synthetic corpus with a Zipfian vocabulary is written through
+the same path the apps use: a flat FAISS store in the SQLite chunk store, then
+`lexical_index.build_local`. Vectors are random, as only latency is measured on
+the dense side. Queries are two rare terms and the most common term of a random
+chunk, which is the chunk they should find.
+
+Reported per size: lexical build time, index file size, load time and RSS
+after loading (the file is memory-mapped), lexical and hybrid query latency,
+lexical hit rate at k and the share of queries the lexical fast path answers
+without an embedding call. Results are printed as JSON lines.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from common import chunk_store, lexical_index
+from common.embedding_engine import FakeEmbeddings
+from common.hybrid_search import HybridSearch
+
+
+def rss_kb():
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def iter_blocks(count, length, vocabulary, dimension, seed=0, block=10000):
+    rng = np.random.default_rng(seed)
+    for start in range(0, count, block):
+        size = min(block, count - start)
+        words = (rng.zipf(1.3, (size, length)) - 1) % vocabulary
+        texts = [" ".join(f"t{word}" for word in row) for row in words.tolist()]
+        yield start, texts, rng.standard_normal((size, dimension), dtype=np.float32)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def make_queries(store, count, seed=1):
+    rng = np.random.default_rng(seed)
+    queries = []
+    for position in rng.integers(0, store.index.ntotal, count).tolist():
+        text = store.docstore.search(store.index_to_docstore_id[position]).page_content
+        # The least frequent words of a chunk identify it best; higher Zipf ranks are rarer
+        words = sorted(set(text.split()), key=lambda word: -int(word[1:]))
+        queries.append((position, " ".join(words[:2] + words[-1:])))
+    return queries
+
+
+def run_size(size, args):
+    with tempfile.TemporaryDirectory() as folder:
+        store = chunk_store.create_local(folder, FakeEmbeddings(size=args.dimension), args.dimension)
+        for start, texts, vectors in iter_blocks(size, args.length, args.vocabulary, args.dimension):
+            store.add_embeddings(zip(texts, vectors), ids=[str(start + i) for i in range(len(texts))])
+        chunk_store.save_local(store, folder)
+        del store
+
+        start = time.perf_counter()
+        lexical_index.build_local(folder)
+        build_seconds = time.perf_counter() - start
+
+        baseline = rss_kb()
+        start = time.perf_counter()
+        lexical = lexical_index.load_local(folder)
+        load_seconds = time.perf_counter() - start
+        load_rss_kb = rss_kb() - baseline
+
+        store = chunk_store.load_local(folder, FakeEmbeddings(size=args.dimension))
+        hybrid = HybridSearch(store, lexical, fast_path_ratio=args.fast_path_ratio)
+        queries = make_queries(store, args.queries)
+        rng = np.random.default_rng(2)
+
+        lexical_ms, hybrid_ms, hits, fast = [], [], 0, 0
+        for position, query in queries:
+            start = time.perf_counter()
+            found = lexical.search(query, hybrid.candidates)
+            lexical_ms.append((time.perf_counter() - start) * 1000)
+            hits += position in found.positions[:args.k].tolist()
+            fast += not hybrid.search(query, args.k)[1]
+
+            embedding = rng.standard_normal(args.dimension).astype(np.float32)
+            start = time.perf_counter()
+            hybrid.search(query, args.k, embedding=embedding)
+            hybrid_ms.append((time.perf_counter() - start) * 1000)
+
+        return {
+            "chunks": size,
+            "postings": len(lexical.postings),
+            "terms": len(lexical.terms),
+            "build_seconds": round(build_seconds, 3),
+            "index_bytes": os.path.getsize(os.path.join(folder, lexical_index.LEXICAL_FILE)),
+            "load_seconds": round(load_seconds, 6),
+            "load_rss_kb": load_rss_kb,
+            "query_rss_kb": rss_kb() - baseline,
+            "lexical_ms_p50": round(percentile(lexical_ms, 50), 4),
+            "lexical_ms_p99": round(percentile(lexical_ms, 99), 4),
+            "hybrid_ms_p50": round(percentile(hybrid_ms, 50), 4),
+            "hybrid_ms_p99": round(percentile(hybrid_ms, 99), 4),
+            "lexical_hit_at_k": round(hits / len(queries), 4),
+            "fast_path_rate": round(fast / len(queries), 4),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--length", type=int, default=60, help="words per chunk")
+    parser.add_argument("--vocabulary", type=int, default=200000)
+    parser.add_argument("--dimension", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--fast-path-ratio", type=float, default=2.0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(json.dumps({"dimension": args.dimension, "k": args.k, **run_size(size, args)}), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark FAISS index modes: search latency, resident memory and recall@k against exact search.
+
+    python benchmarks/index_modes.py --sizes 10000 100000 1000000 --dimension 128
+
+For every corpus size a clustered synthetic dataset is generated and the exact
+neighbours of the query set are computed with a flat index. Each mode is then
+built and saved in one subprocess and loaded (memory-mapped by default) and
+searched in a fresh subprocess, so the reported RSS is what a serving process
+pays for that index. Results are printed as JSON lines.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import faiss
+import numpy as np
+
+from common.index_factory import INDEX_MODES, build_index, factory_string, read_index
+
+
+def make_vectors(count, dimension, seed=0, clusters=256):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension), dtype=np.float32)
+    vectors = np.empty((count, dimension), dtype=np.float32)
+    for start in range(0, count, 100000):
+        stop = min(count, start + 100000)
+        labels = rng.integers(0, clusters, stop - start)
+        vectors[start:stop] = centers[labels] + 0.3 * rng.standard_normal((stop - start, dimension), dtype=np.float32)
+    return vectors
+
+
+def rss_kb():
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def build(args):
+    vectors = np.load(args.data, mmap_mode="r")
+    start = time.perf_counter()
+    index = build_index(np.asarray(vectors), args.mode)
+    seconds = time.perf_counter() - start
+    faiss.write_index(index, args.index)
+    print(json.dumps({"build_seconds": seconds, "factory": factory_string(args.mode, vectors.shape[1], len(vectors))}))
+
+
+def serve(args):
+    queries = np.load(args.query_file)
+    truth = np.load(args.truth)
+    baseline = rss_kb()
+    start = time.perf_counter()
+    index = read_index(args.index, args.mmap)
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    found = []
+    for query in queries:
+        query_start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), args.k)
+        latencies.append((time.perf_counter() - query_start) * 1000)
+        found.append(ids[0])
+    recall = np.mean([len(set(row) & set(expected[:args.k])) / args.k for row, expected in zip(found, truth)])
+    latencies.sort()
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "rss_kb": rss_kb() - baseline,
+        "query_ms_p50": latencies[len(latencies) // 2],
+        "query_ms_p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "recall_at_k": float(recall),
+    }))
+
+
+def run(*argv):
+    output = subprocess.run([sys.executable, __file__, *argv], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dimension", type=int, default=128)
+    parser.add_argument("--modes", nargs="+", default=list(INDEX_MODES), choices=INDEX_MODES)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--no-mmap", dest="mmap", action="store_false")
+    parser.add_argument("--step", choices=["build", "serve"], help=argparse.SUPPRESS)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    parser.add_argument("--index", help=argparse.SUPPRESS)
+    parser.add_argument("--query-file", help=argparse.SUPPRESS)
+    parser.add_argument("--truth", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.step == "build":
+        return build(args)
+    if args.step == "serve":
+        return serve(args)
+
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            data_path = os.path.join(folder, f"vectors-{size}.npy")
+            queries_path = os.path.join(folder, f"queries-{size}.npy")
+            truth_path = os.path.join(folder, f"truth-{size}.npy")
+            vectors = make_vectors(size, args.dimension)
+            queries = make_vectors(args.queries, args.dimension, seed=1)
+            exact = faiss.IndexFlatL2(args.dimension)
+            exact.add(vectors)
+            _, truth = exact.search(queries, args.k)
+            np.save(data_path, vectors)
+            np.save(queries_path, queries)
+            np.save(truth_path, truth)
+            del vectors, exact
+
+            for mode in args.modes:
+                index_path = os.path.join(folder, f"{mode}-{size}.faiss")
+                built = run("--step", "build", "--mode", mode, "--data", data_path, "--index", index_path)
+                serve_args = ["--step", "serve", "--query-file", queries_path, "--truth", truth_path, "--index", index_path, "--k", str(args.k)]
+                served = run(*serve_args, *([] if args.mmap else ["--no-mmap"]))
+                print(json.dumps({
+                    "size": size,
+                    "dimension": args.dimension,
+                    "mode": mode,
+                    "mmap": args.mmap,
+                    "index_bytes": os.path.getsize(index_path),
+                    **built,
+                    **served,
+                }))
+                os.remove(index_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark the vectorized MMR re-ranking against per-pair Python loops.
+
+    python benchmarks/mmr_rerank.py --candidates 50 100 250 500 1000 --k 4 10
+
+Candidates are near-duplicate groups of synthetic embeddings (like overlapping
+chunks of one page) scored against a random query. Three implementations pick
+the same k:
+
+* loop: textbook MMR, one Python cosine per (candidate, pick) pair per step.
+* langchain: `maximal_marginal_relevance` from langchain_community.
+* vectorized: `common.mmr.mmr_select`, one matrix-vector product and array update per pick.
+
+Also reported: the mean pairwise cosine of the picks against plain top-k, and
+how many picks the token budget admits. Results are printed as JSON lines.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+
+from common.mmr import mmr_select, normalize_rows
+
+
+def make_candidates(count, dimension, group=5, seed=0):
+    rng = np.random.default_rng(seed)
+    query = rng.standard_normal(dimension).astype(np.float32)
+    centers = rng.standard_normal((-(-count // group), dimension)).astype(np.float32) + 0.5 * query
+    vectors = np.repeat(centers, group, axis=0)[:count]
+    vectors += 0.1 * rng.standard_normal(vectors.shape).astype(np.float32)
+    costs = rng.integers(100, 1800, count)
+    return query, vectors, costs
+
+
+def loop_mmr(query, vectors, k, lambda_mult):
+    def cosine(a, b):
+        return sum(x * y for x, y in zip(a, b)) / (math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b)))
+
+    rows = vectors.tolist()
+    query = query.tolist()
+    relevance = [cosine(query, row) for row in rows]
+    selected = []
+    while len(selected) < min(k, len(rows)):
+        best, best_score = None, -math.inf
+        for i, row in enumerate(rows):
+            if i in selected:
+                continue
+            redundancy = max((cosine(row, rows[j]) for j in selected), default=0.0)
+            score = lambda_mult * relevance[i] - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        selected.append(best)
+    return selected
+
+
+def timed(func, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return result, round(samples[len(samples) // 2], 4)
+
+
+def mean_pairwise(vectors, picks):
+    unit = normalize_rows(vectors[picks])
+    similarity = unit @ unit.T
+    return round(float(similarity[~np.eye(len(picks), dtype=bool)].mean()), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[50, 100, 250, 500, 1000])
+    parser.add_argument("--k", type=int, nargs="+", default=[4, 10])
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--lambda-mult", type=float, default=0.7)
+    parser.add_argument("--token-budget", type=int, default=4000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    for count in args.candidates:
+        query, vectors, costs = make_candidates(count, args.dimension)
+        relevance = normalize_rows(vectors) @ normalize_rows([query])[0]
+        for k in args.k:
+            picks, vectorized_ms = timed(lambda: mmr_select(relevance, vectors, k, args.lambda_mult), args.repeats)
+            _, langchain_ms = timed(
+                lambda: maximal_marginal_relevance(query, list(vectors), args.lambda_mult, k), args.repeats
+            )
+            loop_picks, loop_ms = timed(lambda: loop_mmr(query, vectors, k, args.lambda_mult), max(1, args.repeats // 10))
+            budgeted = mmr_select(relevance, vectors, k, args.lambda_mult, costs, args.token_budget)
+            top_k = np.argsort(-relevance)[:k].tolist()
+            print(json.dumps({
+                "candidates": count,
+                "k": k,
+                "dimension": args.dimension,
+                "loop_ms": loop_ms,
+                "langchain_ms": langchain_ms,
+                "vectorized_ms": vectorized_ms,
+                "same_picks_as_loop": picks == loop_picks,
+                "top_k_mean_cosine": mean_pairwise(vectors, top_k),
+                "mmr_mean_cosine": mean_pairwise(vectors, picks),
+                "budget_picks": len(budgeted),
+                "budget_tokens": int(costs[budgeted].sum()),
+            }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Compare the serial `text += page.extract_text()` loop with the parallel, streaming
+extraction pipeline on a synthetic PDF set.
+
+    python benchmarks/pdf_extraction.py --files 4 --pages 200
+
+Each mode runs in a fresh subprocess so its peak RSS (including worker
+processes) is measured independently. The pipeline is given the PDFs as bytes,
+as chatpdf passes its uploads.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_pdf(path, pages, lines_per_page=45):
+    """
+    Write a minimal text-only PDF with the given number of pages.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        lines = [
+            f"({page:04d}-{line:02d} Students compare course fees, ratings and placements at each college.) Tj T*"
+            for line in range(lines_per_page)
+        ]
+        stream = ("BT /F1 9 Tf 12 TL 36 800 Td " + " ".join(lines) + " ET").encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d >>" % pages
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def run_serial(paths):
+    from PyPDF2 import PdfReader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    text = ""
+    for path in paths:
+        for page in PdfReader(path).pages:
+            text += page.extract_text()
+    return len(RecursiveCharacterTextSplitter(chunk_size=10000, chunk_overlap=1000).split_text(text))
+
+
+def run_pipeline(paths, workers):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from common.pdf_extraction import iter_pdf_pages, iter_text_chunks
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=10000, chunk_overlap=1000)
+    files = []
+    for path in paths:
+        with open(path, "rb") as f:
+            files.append((path, f.read()))
+    pages = iter_pdf_pages(files, max_workers=workers)
+    return sum(1 for _ in iter_text_chunks((text for _, _, text in pages), splitter))
+
+
+def run_mode(mode, paths, workers):
+    start = time.perf_counter()
+    chunks = run_serial(paths) if mode == "serial" else run_pipeline(paths, workers)
+    seconds = time.perf_counter() - start
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "mode": mode,
+        "workers": workers,
+        "seconds": seconds,
+        "chunks": chunks,
+        "peak_rss_kb": self_rss,
+        "peak_worker_rss_kb": child_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=200, help="pages per file")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--mode", choices=["serial", "pipeline"], help=argparse.SUPPRESS)
+    parser.add_argument("--paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.paths, args.workers[0])))
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for index in range(args.files):
+            path = os.path.join(folder, f"synthetic-{index}.pdf")
+            make_pdf(path, args.pages)
+            paths.append(path)
+        runs = [("serial", 1)] + [("pipeline", workers) for workers in args.workers]
+        for mode, workers in runs:
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--workers", str(workers), "--paths", *paths],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            print(output.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Compare the ATS app's old resume rasterization with PageRasterizer on 1- and 10-page PDFs.
+
+    python benchmarks/pdf_rasterize.py --pages 1 10 --workers 1 4
+
+Needs poppler (pdftoppm/pdfinfo on PATH, or POPPLER_PATH). Synthetic text
+resumes are generated with the same writer as benchmarks/pdf_extraction.py.
+Each run happens in a fresh subprocess so peak RSS is measured on its own,
+for the Python process and separately for the poppler children:
+
+* old: `convert_from_bytes` at its default 200 DPI over every page, the first
+  page re-encoded to JPEG with PIL and base64-encoded, as `input_pdf_setup` did
+* first: PageRasterizer rendering only page 1 (the old output, made cheaply)
+* all: PageRasterizer rendering every page, split over `--workers` pdftoppm
+  processes
+
+`payload_bytes` is what is handed to Gemini. Results are printed as JSON lines.
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_extraction import make_pdf
+
+
+def run_old(pdf):
+    import pdf2image
+
+    images = pdf2image.convert_from_bytes(pdf, poppler_path=os.getenv("POPPLER_PATH") or None)
+    buffer = io.BytesIO()
+    images[0].save(buffer, format="JPEG")
+    return [base64.b64encode(buffer.getvalue()).decode()]
+
+
+def run_new(pdf, max_pages, workers):
+    from common.pdf_raster import PageRasterizer
+
+    return PageRasterizer.from_env(max_pages=max_pages, workers=workers).render(pdf)
+
+
+def run_mode(mode, path, workers):
+    with open(path, "rb") as f:
+        pdf = f.read()
+    start = time.perf_counter()
+    if mode == "old":
+        parts = run_old(pdf)
+    else:
+        parts = run_new(pdf, 1 if mode == "first" else 0, workers)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "seconds": round(time.perf_counter() - start, 3),
+        "pages_sent": len(parts),
+        "payload_bytes": sum(len(part) for part in parts),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "peak_poppler_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--mode", choices=["old", "first", "all"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.path, args.workers[0])))
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        for pages in args.pages:
+            path = os.path.join(folder, f"resume-{pages}.pdf")
+            make_pdf(path, pages)
+            runs = [("old", 1), ("first", 1)] + [("all", workers) for workers in args.workers if pages > 1]
+            for mode, workers in runs:
+                output = subprocess.run(
+                    [sys.executable, __file__, "--mode", mode, "--workers", str(workers), "--path", path],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                result = {"pages": pages}
+                result.update(json.loads(output))
+                print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Compare sql-app's old per-row `st.write` rendering with the columnar, paginated result table.
+
+    python benchmarks/result_rendering.py --rows 1000 10000 100000 1000000 --old-max-rows 10000
+
+A COLLEGES table of N rows is generated and `SELECT * FROM COLLEGES` is read
+through GuardedQuery. Two minimal Streamlit pages are run headless with
+streamlit.testing's AppTest:
+
+* old: every fetched row written with `st.write(row)`, as before
+* new: the result collected into a ResultTable, then one page of
+  SQL_RESULT_PAGE_ROWS rows shown with `st.dataframe`
+
+For the new page the first run (query + conversion + first page), a sort, a
+page turn and a filter are timed separately, plus a CSV and a Parquet export.
+`payload_bytes` is the size of what the page sends to the browser: the
+markdown of every row for old, the Arrow IPC bytes of one page for new. The
+old page is skipped above --old-max-rows. Results are printed as JSON lines.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import textwrap
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import pyarrow as pa
+from streamlit.testing.v1 import AppTest
+
+OLD_APP = textwrap.dedent("""
+    import sys
+    import streamlit as st
+    sys.path.append({root!r})
+    from common.sql_guard import GuardedQuery, QueryPolicy
+    from common.sqlite_pool import SQLitePool
+
+    pool = SQLitePool({db!r})
+    for page in GuardedQuery(pool, "SELECT * FROM COLLEGES", QueryPolicy(max_scan_rows=None, time_budget=None, max_rows=None)):
+        for row in page:
+            st.write(row)
+    pool.close()
+""")
+
+NEW_APP = textwrap.dedent("""
+    import sys
+    import streamlit as st
+    sys.path.append({root!r})
+    from common.result_table import ResultTable
+    from common.sql_guard import GuardedQuery, QueryPolicy
+    from common.sqlite_pool import SQLitePool
+
+    if "result" not in st.session_state:
+        pool = SQLitePool({db!r})
+        query = GuardedQuery(pool, "SELECT * FROM COLLEGES", QueryPolicy(max_scan_rows=None, time_budget=None, max_rows=None))
+        st.session_state.result = ResultTable.from_query(query)
+        pool.close()
+    result = st.session_state.result
+    sort_by = st.selectbox("Sort by", [None] + result.columns, key="sort_by")
+    contains = st.text_input("Containing", key="contains")
+    page = st.number_input("Page", min_value=1, value=1, key="page")
+    view = result.view(sort_by, False, "name", contains)
+    st.dataframe(view.slice((page - 1) * {page_rows}, {page_rows}), hide_index=True)
+""")
+
+
+def build_database(path, rows):
+    rng = random.Random(0)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE COLLEGES (name TEXT NOT NULL, courses TEXT NOT NULL, rating REAL NOT NULL, fee INTEGER NOT NULL)")
+    conn.executemany("INSERT INTO COLLEGES VALUES (?, ?, ?, ?)", (
+        (f"College {i}", "BTech: Computer Science, Robotics; Diploma: Civil Engineering",
+         round(rng.uniform(2.5, 5.0), 1), rng.randrange(10000, 400000))
+        for i in range(rows)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def timed_run(app):
+    start = time.perf_counter()
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return round(time.perf_counter() - start, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--old-max-rows", type=int, default=10000)
+    parser.add_argument("--page-rows", type=int, default=int(os.getenv("SQL_RESULT_PAGE_ROWS", 1000)))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        for rows in args.rows:
+            db = os.path.join(folder, f"colleges-{rows}.db")
+            build_database(db, rows)
+
+            if rows <= args.old_max_rows:
+                app = AppTest.from_string(OLD_APP.format(root=ROOT, db=db), default_timeout=3600)
+                seconds = timed_run(app)
+                print(json.dumps({
+                    "rows": rows,
+                    "variant": "old",
+                    "first_run_s": seconds,
+                    "elements": len(app.markdown),
+                    "payload_bytes": sum(len(element.value) for element in app.markdown),
+                }), flush=True)
+
+            app = AppTest.from_string(NEW_APP.format(root=ROOT, db=db, page_rows=args.page_rows), default_timeout=3600)
+            result = {"rows": rows, "variant": "new", "first_run_s": timed_run(app)}
+            page = pa.Table.from_pandas(app.dataframe[0].value, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, page.schema) as writer:
+                writer.write_table(page)
+            result["payload_bytes"] = sink.getvalue().size
+            app.selectbox(key="sort_by").set_value("fee")
+            result["sort_s"] = timed_run(app)
+            app.number_input(key="page").set_value(3)
+            result["page_s"] = timed_run(app)
+            app.text_input(key="contains").input("9")
+            result["filter_s"] = timed_run(app)
+            table = app.session_state["result"]
+            for file_format in ("csv", "parquet"):
+                start = time.perf_counter()
+                data = table.export(table.table, file_format)
+                result[f"{file_format}_export_s"] = round(time.perf_counter() - start, 3)
+                result[f"{file_format}_bytes"] = len(data)
+            print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Sweep chunk size, chunk overlap and k over the splitter + FAISS retrieval pipeline.
+
+    python benchmarks/retrieval_sweep.py --output results.json
+
+The corpus is loaded with the same PyPDFDirectoryLoader the groq apps use and
+embedded with the deterministic offline FakeEmbeddings, so results are
+reproducible and comparable between versions. Each question in the labeled
+set has an `evidence` string: a retrieved chunk is relevant when it contains
+that string once whitespace is removed and case is folded.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.document_loaders import PyPDFDirectoryLoader
+from langchain_community.vectorstores import FAISS
+
+from common.embedding_engine import FakeEmbeddings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS = os.path.join(ROOT, "groq", "education")
+DEFAULT_QUESTIONS = os.path.join(ROOT, "benchmarks", "data", "education_questions.jsonl")
+
+
+def squash(text):
+    return re.sub(r"\s+", "", text).lower()
+
+
+def load_questions(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def folder_bytes(folder):
+    return sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_config(docs, questions, chunk_size, chunk_overlap, ks, embeddings, repeats):
+    start = time.perf_counter()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = splitter.split_documents(docs)
+    store = FAISS.from_documents(chunks, embeddings)
+    ingest_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as folder:
+        store.save_local(folder)
+        index_bytes = folder_bytes(folder)
+
+    results = []
+    for k in ks:
+        latencies = []
+        hits = 0
+        for question in questions:
+            for _ in range(repeats):
+                query_start = time.perf_counter()
+                found = store.similarity_search(question["question"], k=k)
+                latencies.append((time.perf_counter() - query_start) * 1000)
+            evidence = squash(question["evidence"])
+            hits += any(evidence in squash(doc.page_content) for doc in found)
+        results.append({
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "k": k,
+            "chunks": len(chunks),
+            "ingest_seconds": round(ingest_seconds, 4),
+            "index_bytes": index_bytes,
+            "query_ms_p50": round(percentile(latencies, 50), 4),
+            "query_ms_p95": round(percentile(latencies, 95), 4),
+            "query_ms_p99": round(percentile(latencies, 99), 4),
+            "query_ms_mean": round(statistics.mean(latencies), 4),
+            "recall_at_k": round(hits / len(questions), 4),
+            "context_chars_at_k": k * chunk_size,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[500, 1000, 2000, 5000, 10000])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, 200, 1000])
+    parser.add_argument("--ks", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--repeats", type=int, default=5, help="timed searches per question")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    docs = PyPDFDirectoryLoader(args.corpus).load()
+    questions = load_questions(args.questions)
+    embeddings = FakeEmbeddings(size=args.dimensions)
+
+    results = []
+    for chunk_size in args.chunk_sizes:
+        for chunk_overlap in args.overlaps:
+            if chunk_overlap >= chunk_size:
+                continue
+            results.extend(run_config(docs, questions, chunk_size, chunk_overlap, args.ks, embeddings, args.repeats))
+
+    report = {
+        "corpus": os.path.relpath(args.corpus, ROOT),
+        "pages": len(docs),
+        "questions": len(questions),
+        "embedder": f"FakeEmbeddings(size={args.dimensions})",
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Compare the full-schema NL-to-SQL prompt with the schema-pruned one on a large synthetic database.
+
+    python benchmarks/schema_prompt.py --tables 200 --questions 50 --max-tables 8
+    python benchmarks/schema_prompt.py --tables 200 --questions 10 --live   # also calls Gemini, needs GOOGLE_API_KEY
+
+A database of N tables is generated: business domains (sales, hr, billing, ...)
+each with a handful of entity tables of 5-20 columns, foreign keys between
+tables of a domain, and the college tables from sql.py. Questions are written
+about one table each, naming its entity and a column in plain words ("average
+unit price of sales orders"). For every question the schema section is built
+both ways and the report gives its size (tokens estimated as characters / 4,
+or counted by Gemini with --live), whether the question's table was kept, and
+the time to pick and render the tables. With --live each prompt is also sent
+to gemini-pro and the end-to-end latency measured. Results are printed as JSON
+lines, ending with a summary line.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "sql-app")]
+
+from common.schema_prompt import SchemaPrompt
+from sql import create_course_tables, create_table
+
+DOMAINS = [
+    "sales", "hr", "billing", "inventory", "shipping", "support", "marketing", "finance", "payroll", "procurement",
+    "crm", "analytics", "logistics", "compliance", "legal", "facilities", "fleet", "manufacturing", "quality",
+    "research", "training", "events", "retail", "warehouse", "audit", "security", "catalog", "pricing", "partners",
+    "subscriptions",
+]
+ENTITIES = [
+    "orders", "customers", "invoices", "products", "employees", "vendors", "contracts", "tickets", "campaigns",
+    "accounts", "shipments", "payments", "assets", "projects", "locations", "reviews", "licenses", "budgets",
+]
+COLUMNS = [
+    ("status", "TEXT"), ("amount", "REAL"), ("unit_price", "REAL"), ("quantity", "INTEGER"), ("due_date", "TEXT"),
+    ("region", "TEXT"), ("priority", "INTEGER"), ("email", "TEXT"), ("phone_number", "TEXT"), ("discount_rate", "REAL"),
+    ("tax_code", "TEXT"), ("currency", "TEXT"), ("approved_by", "TEXT"), ("start_date", "TEXT"), ("end_date", "TEXT"),
+    ("score", "REAL"), ("category", "TEXT"), ("description", "TEXT"), ("weight_kg", "REAL"), ("cost_center", "TEXT"),
+    ("headcount", "INTEGER"), ("renewal_date", "TEXT"), ("sku", "TEXT"), ("balance", "REAL"), ("rating", "REAL"),
+    ("country", "TEXT"), ("channel", "TEXT"), ("owner_name", "TEXT"), ("shipping_method", "TEXT"), ("margin", "REAL"),
+]
+QUESTION_SHAPES = [
+    "What is the average {column} of {domain} {entity}?",
+    "List the {domain} {entity} with the highest {column}.",
+    "How many {domain} {entity} have a {column} set?",
+    "Show {column} for every {domain} {entity} created this year",
+]
+HEADER = (
+    "You are an expert in converting natural language questions into SQL queries for a SQLite database. "
+    "The database contains:\n"
+)
+
+
+def build_database(path, count, seed=0):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    create_table(cursor)
+    create_course_tables(cursor)
+    tables = []
+    names = [f"{domain}_{entity}" for domain in DOMAINS for entity in ENTITIES]
+    rng.shuffle(names)
+    for name in sorted(names[:max(0, count - 3)]):
+        domain = name.split("_", 1)[0]
+        columns = rng.sample(COLUMNS, rng.randint(5, 20))
+        parents = [table for table, _ in tables if table.startswith(domain + "_")]
+        references = rng.sample(parents, min(len(parents), rng.randint(0, 2)))
+        definition = ["id INTEGER PRIMARY KEY", "created_at TEXT", "updated_at TEXT"]
+        definition += [f"{column} {declared}" for column, declared in columns]
+        definition += [f"{parent.split('_', 1)[1]}_id INTEGER REFERENCES {parent}(id)" for parent in references]
+        cursor.execute(f"CREATE TABLE {name} ({', '.join(definition)})")
+        tables.append((name, columns))
+    conn.commit()
+    return conn, tables
+
+
+def make_questions(tables, count, seed=0):
+    rng = random.Random(seed)
+    questions = []
+    for name, columns in rng.sample(tables, min(count, len(tables))):
+        domain, entity = name.split("_", 1)
+        column = rng.choice(columns)[0].replace("_", " ")
+        questions.append((rng.choice(QUESTION_SHAPES).format(domain=domain, entity=entity, column=column), name))
+    return questions
+
+
+def estimate_tokens(text):
+    return len(text) // 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--max-tables", type=int, default=8)
+    parser.add_argument("--live", action="store_true", help="send both prompts to gemini-pro (needs GOOGLE_API_KEY)")
+    args = parser.parse_args()
+
+    model = None
+    if args.live:
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+        model = genai.GenerativeModel("gemini-pro")
+
+    with tempfile.TemporaryDirectory() as folder:
+        conn, tables = build_database(os.path.join(folder, "large.db"), args.tables)
+        start = time.perf_counter()
+        schema_prompt = SchemaPrompt.from_connection(conn, max_tables=args.max_tables)
+        build_ms = (time.perf_counter() - start) * 1000
+        full_schema = schema_prompt.render(schema_prompt.tables)
+
+        rows = []
+        for question, table in make_questions(tables, args.questions):
+            start = time.perf_counter()
+            selected = schema_prompt.select(question)
+            pruned_schema = schema_prompt.render(selected)
+            select_ms = (time.perf_counter() - start) * 1000
+            row = {
+                "question": question,
+                "table": table,
+                "kept": table in {chosen.name for chosen in selected},
+                "tables_sent": len(selected),
+                "select_ms": round(select_ms, 3),
+            }
+            for variant, schema in (("full", full_schema), ("pruned", pruned_schema)):
+                prompt = HEADER + schema
+                if model is None:
+                    row[f"{variant}_tokens"] = estimate_tokens(prompt)
+                    continue
+                row[f"{variant}_tokens"] = model.count_tokens([prompt, question]).total_tokens
+                start = time.perf_counter()
+                model.generate_content([prompt, question])
+                row[f"{variant}_latency_s"] = round(time.perf_counter() - start, 3)
+            rows.append(row)
+            print(json.dumps(row), flush=True)
+        conn.close()
+
+    summary = {
+        "tables": len(schema_prompt.tables),
+        "questions": len(rows),
+        "max_tables": args.max_tables,
+        "schema_build_ms": round(build_ms, 1),
+        "recall": round(sum(row["kept"] for row in rows) / len(rows), 3),
+        "full_tokens": statistics.median(row["full_tokens"] for row in rows),
+        "pruned_tokens": statistics.median(row["pruned_tokens"] for row in rows),
+        "select_ms_median": round(statistics.median(row["select_ms"] for row in rows), 3),
+        "tokens_counted_by": "gemini" if model is not None else "characters / 4",
+    }
+    summary["token_reduction"] = round(1 - summary["pruned_tokens"] / summary["full_tokens"], 3)
+    if model is not None:
+        summary["full_latency_s"] = statistics.median(row["full_latency_s"] for row in rows)
+        summary["pruned_latency_s"] = statistics.median(row["pruned_latency_s"] for row in rows)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
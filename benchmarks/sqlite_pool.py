@@ -0,0 +1,117 @@
+"""
+Measure sql-app query throughput with a connection per query versus the shared read-only pool.
+
+    python benchmarks/sqlite_pool.py --rows 1000000 --threads 1 4 16 --seconds 5
+
+`college.db` is scaled up by repeating its rows with varied names, ratings and
+fees into a temporary database. Each thread then runs a mix of the queries the
+app generates (a lookup by name, a filter on rating with a LIMIT, an ORDER BY
+fee LIMIT 1 over a LIKE on courses, and a COUNT) for a fixed time, either
+opening and closing a connection per query as `read_sql_query` used to, or
+borrowing one from `SQLitePool`. Results are printed as JSON lines.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.sqlite_pool import SQLitePool
+
+SOURCE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql-app", "college.db")
+
+QUERIES = [
+    ("SELECT fee FROM COLLEGES WHERE rowid = ?", lambda rng, rows: (rng.randrange(1, rows + 1),)),
+    ("SELECT name FROM COLLEGES WHERE rating > ? LIMIT 10", lambda rng, rows: (rng.choice((4.0, 4.5, 4.8)),)),
+    ("SELECT name FROM COLLEGES WHERE courses LIKE ? ORDER BY fee ASC LIMIT 1", lambda rng, rows: ("%Robotics%",)),
+    ("SELECT COUNT(*) FROM COLLEGES WHERE fee < ?", lambda rng, rows: (rng.randrange(20000, 40000),)),
+]
+
+
+def scale_database(path, rows):
+    shutil.copyfile(SOURCE_DB, path)
+    conn = sqlite3.connect(path)
+    base = conn.execute("SELECT name, courses, rating, fee FROM COLLEGES").fetchall()
+    conn.execute("DELETE FROM COLLEGES")
+    rng = random.Random(0)
+    batch = []
+    for i in range(rows):
+        name, courses, rating, fee = base[i % len(base)]
+        batch.append((f"{name} {i}", courses, round(min(5.0, max(1.0, rating + rng.uniform(-1, 0.4))), 1), fee + rng.randrange(-5000, 5000)))
+        if len(batch) == 10000:
+            conn.executemany("INSERT INTO COLLEGES VALUES (?, ?, ?, ?)", batch)
+            batch = []
+    conn.executemany("INSERT INTO COLLEGES VALUES (?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def run_load(query, threads, seconds, rows, heavy):
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(slot):
+        rng = random.Random(slot)
+        queries = QUERIES if heavy else QUERIES[:2]
+        while time.perf_counter() < deadline:
+            sql, params = rng.choice(queries)
+            query(sql, params(rng, rows))
+            counts[slot] += 1
+
+    workers = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "college.db")
+        scale_database(path, args.rows)
+        pool = SQLitePool(path, size=args.pool_size)
+
+        def per_query(sql, params):
+            conn = sqlite3.connect(path)
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            cur.fetchall()
+            conn.close()
+
+        def pooled(sql, params):
+            with pool.connection() as conn:
+                conn.execute(sql, params).fetchall()
+
+        for mix, heavy in (("point", False), ("mixed", True)):
+            for threads in args.threads:
+                for variant, query in (("connect_per_query", per_query), ("pool", pooled)):
+                    qps = run_load(query, threads, args.seconds, args.rows, heavy)
+                    print(json.dumps({
+                        "rows": args.rows,
+                        "mix": mix,
+                        "threads": threads,
+                        "variant": variant,
+                        "qps": round(qps, 1),
+                    }), flush=True)
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,202 @@
 import streamlit as st
-from PyPDF2 import PdfReader
+from itertools import groupby
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+import logging
 import os
+import sys
+import time
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 import google.generativeai as genai
-from langchain.vectorstores import FAISS
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.chains.question_answering import load_qa_chain
 from langchain.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import chunk_store, index_factory, lexical_index
+from common.manifest import IndexManifest, chunk_id, hash_bytes
+from common.answer_cache import AnswerCache
+from common.embedding_cache import CachedEmbeddings, get_default_cache
+from common.embedding_engine import BatchEmbeddings
+from common.hybrid_search import HybridSearch
+from common.langchain_tracing import SpanCallbackHandler
+from common.pdf_extraction import iter_pdf_pages, iter_text_chunks
+from common.tracing import current_span, span, timed_iter, traced
+from index_holder import IndexHolder
+
 # Load environment variables
 load_dotenv()
 api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=api_key)
 
-def get_pdf_text(pdf_docs):
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = "faiss_index"
+EMBEDDING_MODEL = "models/embedding-001"
+INDEX_MODE = index_factory.index_mode_from_env()
+
+def get_text_splitter():
+    return RecursiveCharacterTextSplitter(chunk_size=10000, chunk_overlap=1000)
+
+def get_embeddings(progress=None):
     """
-    Extract text from a list of PDF documents.
+    Create the Gemini embeddings client, wrapped so cached chunks are not re-embedded
+    and the rest are embedded in concurrent, rate-limited batches.
     """
-    text = ""
-    try:
-        for pdf in pdf_docs:
-            pdf_reader = PdfReader(pdf)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-        if not text:
-            raise ValueError("No text extracted from PDF documents.")
-    except Exception as e:
-        st.error(f"Error reading PDF files: {e}")
-        raise
-    return text
+    batched = BatchEmbeddings.from_env(GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL), progress=progress)
+    return CachedEmbeddings(batched, get_default_cache(), EMBEDDING_MODEL)
 
-def get_text_chunks(text):
+def load_vector_store(embeddings):
     """
-    Split text into smaller chunks for processing.
+    Load the saved FAISS vector store for updating, or return None if it has not been built yet.
     """
-    try:
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=10000, chunk_overlap=1000)
-        chunks = text_splitter.split_text(text)
-    except Exception as e:
-        st.error(f"Error splitting text into chunks: {e}")
-        raise
-    return chunks
+    if not os.path.exists(os.path.join(INDEX_DIR, "index.faiss")):
+        return None
+    return chunk_store.load_local(INDEX_DIR, embeddings, writable=True)
 
-def get_vector_store(text_chunks):
+def rebuild_vector_store(vector_store, embeddings, exclude_ids=()):
     """
-    Create and save a FAISS vector store from text chunks.
+    Rebuild the store in INDEX_MODE and close the one it was read from, whose scratch chunk file the save replaces.
+    """
+    rebuilt = index_factory.rebuild(vector_store, embeddings, INDEX_MODE, exclude_ids=exclude_ids)
+    chunk_store.close(vector_store)
+    return rebuilt
+
+def iter_file_chunks(pdf_docs):
+    """
+    Stream the PDFs through parallel page extraction and incremental splitting,
+    yielding (file name, chunk ids, chunks) per file with duplicate chunks removed.
+    """
+    splitter = get_text_splitter()
+    pages = timed_iter("extract", iter_pdf_pages((pdf.name, pdf.getvalue()) for pdf in pdf_docs))
+    for name, file_pages in groupby(pages, key=lambda page: page[0]):
+        chunks = {}
+        for chunk in timed_iter("split", iter_text_chunks((page_text for _, _, page_text in file_pages), splitter)):
+            chunks.setdefault(chunk_id(name, chunk), chunk)
+        yield name, list(chunks.keys()), list(chunks.values())
+
+@st.cache_resource
+def get_index_holder():
+    """
+    Return the process-wide holder keeping the FAISS index resident across questions, sessions and reruns.
+    The index is memory-mapped and chunk texts stay in SQLite until a search returns them.
+    Searches fuse the vectors with the BM25 index built beside them.
+    """
+    embeddings = get_embeddings()
+    return IndexHolder(INDEX_DIR, lambda folder: HybridSearch.from_env(
+        chunk_store.load_local(folder, embeddings), lexical_index.load_local(folder, build_missing=True)
+    ))
+
+@st.cache_resource
+def get_answer_cache():
+    """
+    Return the process-wide cache of answers, keyed by index version and question.
+    """
+    return AnswerCache.from_env()
+
+@traced("ingest")
+def get_vector_store(pdf_docs):
+    """
+    Incrementally update the saved FAISS vector store from the uploaded PDFs.
+
+    Unchanged files are skipped using the manifest of content hashes kept beside
+    the index, only chunks that are not already indexed are embedded, and chunks
+    of changed or removed files are deleted. An index without a manifest (built
+    before the manifest existed) is rebuilt from scratch.
     """
     try:
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-        vector_store = FAISS.from_texts(text_chunks, embedding=embeddings)
-        vector_store.save_local("faiss_index")
-        st.success("Vector store created and saved successfully.")
+        progress_bar = st.progress(0.0, text="Embedding chunks...")
+        embeddings = get_embeddings(progress=lambda done, total: progress_bar.progress(done / total, text=f"Embedded {done}/{total} chunks"))
+        manifest = IndexManifest.load(INDEX_DIR)
+        has_index = bool(manifest.files) and os.path.exists(os.path.join(INDEX_DIR, "index.faiss"))
+        if not has_index:
+            manifest = IndexManifest(INDEX_DIR, version=manifest.version)
+
+        uploaded = {pdf.name: pdf for pdf in pdf_docs}
+        ids_to_delete = []
+        for name in list(manifest.files):
+            if name not in uploaded:
+                ids_to_delete.extend(manifest.chunk_ids(name))
+                manifest.remove_file(name)
+
+        changed = {}
+        for name, pdf in uploaded.items():
+            file_hash = hash_bytes(pdf.getvalue())
+            if manifest.file_hash(name) != file_hash:
+                changed[name] = (pdf, file_hash)
+        skipped = len(uploaded) - len(changed)
+
+        new_ids, new_texts, new_metadatas = [], [], []
+        unextracted = set(changed)
+        for name, ids, chunks in iter_file_chunks(pdf for pdf, _ in changed.values()):
+            unextracted.discard(name)
+            if not chunks:
+                st.warning(f"No text extracted from {name}.")
+            old_ids = set(manifest.chunk_ids(name))
+            ids_to_delete.extend(old_ids.difference(ids))
+            for id_, chunk in zip(ids, chunks):
+                if id_ not in old_ids:
+                    new_ids.append(id_)
+                    new_texts.append(chunk)
+                    new_metadatas.append({"source": name})
+            manifest.update_file(name, changed[name][1], ids)
+        # Files without pages yield no chunks at all
+        for name in unextracted:
+            st.warning(f"No text extracted from {name}.")
+            ids_to_delete.extend(manifest.chunk_ids(name))
+            manifest.update_file(name, changed[name][1], [])
+
+        index_path = os.path.join(INDEX_DIR, chunk_store.INDEX_FILE)
+        # A changed FAISS_INDEX_MODE alone still needs the retrain below
+        if not ids_to_delete and not new_ids and (not has_index or index_factory.saved_matches_mode(index_path, INDEX_MODE)):
+            if changed:
+                manifest.save()
+            st.success(f"Vector store is up to date ({skipped} unchanged files skipped).")
+            return
+
+        vector_store = load_vector_store(embeddings) if has_index else None
+
+        if vector_store is not None and ids_to_delete:
+            if index_factory.supports_removal(vector_store.index):
+                vector_store.delete(ids_to_delete)
+            else:
+                vector_store = rebuild_vector_store(vector_store, embeddings, exclude_ids=ids_to_delete)
+        if new_ids:
+            if vector_store is None:
+                vector_store = index_factory.from_texts(new_texts, embeddings, INDEX_MODE, new_metadatas, new_ids)
+            else:
+                vector_store.add_texts(new_texts, metadatas=new_metadatas, ids=new_ids)
+        # Retrain once the corpus outgrows the index it was first built with (or the mode changed)
+        if vector_store is not None and vector_store.index.ntotal and not index_factory.matches_mode(vector_store.index, INDEX_MODE):
+            vector_store = rebuild_vector_store(vector_store, embeddings)
+
+        with get_index_holder().replacing():
+            if vector_store is not None:
+                with span("save"):
+                    chunk_store.save_local(vector_store, INDEX_DIR)
+                    lexical_index.build_local(INDEX_DIR)
+            # Written last: the holder reloads only once the manifest changes, so it never mixes old and new files
+            manifest.save()
+        current_span().set(files=len(uploaded), changed=len(changed), added_chunks=len(new_ids), deleted_chunks=len(ids_to_delete))
+        get_answer_cache().invalidate()
+        st.success(
+            f"Vector store updated: {len(new_ids)} chunks added, {len(ids_to_delete)} removed, "
+            f"{skipped} unchanged files skipped."
+        )
+        cache_stats = get_default_cache().stats()
+        st.caption(f"Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['evictions']} evictions.")
     except Exception as e:
         st.error(f"Error creating vector store: {e}")
         raise
 
+@st.cache_resource
 def get_conversational_chain():
     """
-    Initialize the conversational AI chain.
+    Initialize the conversational AI chain once per process.
+
+    The chain stuffs the retrieved documents into the prompt and streams the
+    model's answer as text tokens.
     """
     prompt_template = """
     Answer the question as detailed as possible from the provided context, make sure to provide all the details, if the answer is not in
@@ -73,29 +210,58 @@ def get_conversational_chain():
     try:
         model = ChatGoogleGenerativeAI(model="gemini-pro", temperature=0.3)
         prompt = PromptTemplate(template=prompt_template, input_variables=["context", "question"])
-        chain = load_qa_chain(model, chain_type="stuff", prompt=prompt)
+        chain = prompt | model | StrOutputParser()
     except Exception as e:
         st.error(f"Error initializing conversational chain: {e}")
         raise
     return chain
 
+def stream_answer(chain, docs, user_question):
+    """
+    Yield answer tokens as they arrive and log time to first token and total time.
+    The prompt and LLM stages are also recorded as spans by the callback handler.
+    """
+    context = "\n\n".join(doc.page_content for doc in docs)
+    start = time.perf_counter()
+    first_token = None
+    config = {"callbacks": [SpanCallbackHandler()]}
+    for token in chain.stream({"context": context, "question": user_question}, config=config):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        yield token
+    logger.info(
+        "Answer streamed: time to first token %.3fs, total %.3fs",
+        first_token if first_token is not None else float("nan"),
+        time.perf_counter() - start,
+    )
+
+@traced("question")
 def user_input(user_question):
     """
     Handle user input, process the question, and provide an answer from the vector store.
     """
     try:
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-        
-        # Load FAISS vector store
-        new_db = FAISS.load_local("faiss_index", embeddings, allow_dangerous_deserialization=True)
-        docs = new_db.similarity_search(user_question)
+        # Use the resident FAISS vector store, reloaded only if the index changed on disk
+        holder = get_index_holder()
+        new_db = holder.get()
 
-        # Get the conversational chain
-        chain = get_conversational_chain()
+        # Serve repeated (or, with the semantic tier enabled, similar) questions from the cache
+        answer_cache = get_answer_cache()
+        answer, question_embedding = answer_cache.lookup(holder.version, user_question, embed=new_db.embeddings.embed_query)
+        current_span().set(cached=answer is not None)
+        if answer is None:
+            # Lexical and vector hits fused; a confident lexical match skips embedding the question
+            docs, _ = new_db.search(user_question, embedding=question_embedding)
 
-        # Process the question and get the response
-        response = chain({"input_documents": docs, "question": user_question}, return_only_outputs=True)
-        st.write("Reply:", response["output_text"])
+            # Get the conversational chain
+            chain = get_conversational_chain()
+
+            # Stream the response to the page as it is generated
+            st.write("Reply:")
+            answer = st.write_stream(stream_answer(chain, docs, user_question))
+            answer_cache.put(holder.version, user_question, answer, question_embedding)
+        else:
+            st.write("Reply:", answer)
     except Exception as e:
         st.error(f"Error processing user input: {e}")
 
@@ -119,16 +285,19 @@ def main():
             if pdf_docs:
                 with st.spinner("Processing..."):
                     try:
-                        # Get text from PDFs
-                        raw_text = get_pdf_text(pdf_docs)
-                        text_chunks = get_text_chunks(raw_text)
-                        
-                        # Create and save vector store
-                        get_vector_store(text_chunks)
+                        # Update the vector store with only the PDFs that changed
+                        get_vector_store(pdf_docs)
                     except Exception as e:
                         st.error(f"Error during processing: {e}")
             else:
                 st.warning("Please upload PDF files before processing.")
 
+        cache_stats = get_answer_cache().stats()
+        st.caption(
+            f"Answer cache: {cache_stats['exact_hits'] + cache_stats['semantic_hits']} hits "
+            f"({cache_stats['semantic_hits']} semantic), {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['entries']} entries."
+        )
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,76 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from common.chunk_store import CHUNKS_FILE, INDEX_FILE
+from common.lexical_index import LEXICAL_FILE
+from common.manifest import MANIFEST_FILE, IndexManifest
+
+# The manifest comes last: a save writes it after the other files, so it marks a complete index
+INDEX_FILES = (INDEX_FILE, CHUNKS_FILE, LEXICAL_FILE, MANIFEST_FILE)
+
+
+class IndexHolder:
+    """
+    Keep a loaded vector store resident and reload it only when the files on disk change.
+
+    `loader` is called with the index folder and must return the loaded store.
+    Every `get()` only stats the index files. The manifest is the commit point
+    of a save, so the store is reloaded only once the manifest has changed;
+    data files replaced before it belong to a save still in progress, and
+    loading them then could pair new vectors with the old BM25 index.
+    """
+
+    def __init__(self, folder, loader):
+        self.folder = folder
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.store = None
+        self.signature = None
+        self.version = None
+
+    def _signature(self):
+        signature = []
+        for name in INDEX_FILES:
+            try:
+                stat = os.stat(os.path.join(self.folder, name))
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def get(self):
+        """
+        Return the resident store, loading or reloading it if the index changed on disk.
+        """
+        signature = self._signature()
+        if signature == self.signature:
+            return self.store
+        with self.lock:
+            if signature != self.signature:
+                if self.store is not None and signature[-1] == self.signature[-1]:
+                    # No new manifest yet: keep serving the complete index already loaded
+                    self.signature = signature
+                    return self.store
+                if signature[0] is None:
+                    raise FileNotFoundError(f"No FAISS index found in '{self.folder}'. Process some PDFs first.")
+                self.store = self.loader(self.folder)
+                self.version = IndexManifest.load(self.folder).version
+                self.signature = signature
+            return self.store
+
+    @contextmanager
+    def replacing(self):
+        """
+        Close the resident store while a save replaces the index files; the next `get()` loads the new ones.
+
+        Windows cannot replace a file that is still open, and the resident
+        store holds the chunk store's SQLite connection and the memory-mapped
+        indexes. Other threads' `get()` calls wait until the save is done.
+        """
+        with self.lock:
+            if self.store is not None:
+                self.store.close()
+            self.store = self.signature = None
+            yield
@@ -0,0 +1,6 @@
+"""
+Helpers shared by the Streamlit apps in this repository.
+
+The apps are started from their own folders (``streamlit run app.py``), so each
+app adds the repository root to ``sys.path`` before importing from here.
+"""
@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_question(question):
+    """
+    Lower-case the question, collapse whitespace and drop trailing punctuation.
+    """
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?!. ")
+
+
+class AnswerCache:
+    """
+    LRU + TTL cache of answers keyed by (index version, normalized question).
+
+    When `similarity_threshold` is set, a question that misses the exact tier
+    is embedded and served the cached answer whose question embedding has the
+    highest cosine similarity, if that similarity reaches the threshold.
+    Looking up a different index version than the cached one clears the cache,
+    so answers never outlive the index they were generated from.
+    """
+
+    def __init__(self, max_entries=1000, ttl_seconds=3600, similarity_threshold=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.entries = OrderedDict()
+        self.index_version = None
+        self.lock = threading.Lock()
+        self._matrix = None
+        self._matrix_keys = []
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """
+        Build an AnswerCache configured from ANSWER_CACHE_* environment variables.
+        """
+        threshold = os.getenv("ANSWER_CACHE_SIMILARITY")
+        settings = {
+            "max_entries": int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1000)),
+            "ttl_seconds": float(os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600)),
+            "similarity_threshold": float(threshold) if threshold else None,
+        }
+        settings.update(kwargs)
+        return cls(**settings)
+
+    def _check_version(self, index_version):
+        if index_version != self.index_version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self._matrix = None
+            self.index_version = index_version
+
+    def _expire(self, now):
+        for key in [key for key, entry in self.entries.items() if entry["expires_at"] <= now]:
+            del self.entries[key]
+            self._matrix = None
+
+    def _nearest(self, embedding):
+        if self._matrix is None:
+            self._matrix_keys = [key for key, entry in self.entries.items() if entry["embedding"] is not None]
+            if not self._matrix_keys:
+                return None, 0.0
+            self._matrix = np.stack([self.entries[key]["embedding"] for key in self._matrix_keys])
+        if not self._matrix_keys:
+            return None, 0.0
+        scores = self._matrix @ embedding
+        best = int(np.argmax(scores))
+        return self._matrix_keys[best], float(scores[best])
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, index_version, question, embed=None):
+        """
+        Return (answer, question embedding) for a question; answer is None on a miss.
+
+        `embed` is called with the question only when the exact tier misses and
+        the semantic tier is enabled. The embedding it returns is handed back
+        (None if it was not computed) so the caller can reuse it for retrieval
+        and for `put`.
+        """
+        key = normalize_question(question)
+        now = time.monotonic()
+        with self.lock:
+            self._check_version(index_version)
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry["expires_at"] > now:
+                    self.entries.move_to_end(key)
+                    self.exact_hits += 1
+                    return entry["answer"], None
+                del self.entries[key]
+                self._matrix = None
+        if embed is None or self.similarity_threshold is None:
+            with self.lock:
+                self.misses += 1
+            return None, None
+
+        embedding = embed(question)
+        with self.lock:
+            self._check_version(index_version)
+            self._expire(now)
+            match, score = self._nearest(self._unit(embedding))
+            if match is not None and score >= self.similarity_threshold:
+                self.entries.move_to_end(match)
+                self.semantic_hits += 1
+                return self.entries[match]["answer"], embedding
+            self.misses += 1
+        return None, embedding
+
+    def put(self, index_version, question, answer, embedding=None):
+        with self.lock:
+            self._check_version(index_version)
+            key = normalize_question(question)
+            self.entries[key] = {
+                "answer": answer,
+                "embedding": None if embedding is None else self._unit(embedding),
+                "expires_at": time.monotonic() + self.ttl_seconds,
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def invalidate(self):
+        """
+        Drop every cached answer, e.g. right after the index was rebuilt.
+        """
+        with self.lock:
+            self.entries.clear()
+            self._matrix = None
+            self.invalidations += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
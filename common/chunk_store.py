@@ -0,0 +1,253 @@
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+import faiss
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from common.index_factory import read_index
+from common.tracing import span
+
+CHUNKS_FILE = "chunks.sqlite"
+INDEX_FILE = "index.faiss"
+LEGACY_DOCSTORE_FILE = "index.pkl"
+
+
+def _connect(path, readonly=False):
+    if readonly:
+        # Readers never write, so they cannot leave journal files behind when save_local replaces the database
+        return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS chunks (
+            id TEXT PRIMARY KEY,
+            content TEXT NOT NULL,
+            metadata TEXT NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS positions (
+            position INTEGER PRIMARY KEY,
+            id TEXT NOT NULL
+        );
+    """)
+    return conn
+
+
+class SqliteDocstore(Docstore, AddableMixin):
+    """
+    Langchain docstore keeping chunk texts and metadata in SQLite.
+
+    Nothing is read up front: `search` materializes one chunk at a time, so a
+    query only loads its top-k hits no matter how large the corpus is.
+    """
+
+    def __init__(self, conn, lock, path):
+        self.conn = conn
+        self.lock = lock
+        self.path = path
+
+    def search(self, search):
+        with self.lock:
+            row = self.conn.execute("SELECT content, metadata FROM chunks WHERE id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def add(self, texts):
+        rows = [(id_, doc.page_content, json.dumps(doc.metadata)) for id_, doc in texts.items()]
+        with self.lock:
+            try:
+                self.conn.executemany("INSERT INTO chunks (id, content, metadata) VALUES (?, ?, ?)", rows)
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"Tried to add ids that already exist: {e}") from e
+
+    def delete(self, ids):
+        with self.lock:
+            self.conn.executemany("DELETE FROM chunks WHERE id = ?", [(id_,) for id_ in ids])
+
+
+class PositionMap(MutableMapping):
+    """
+    Lazily loaded mapping of FAISS vector position -> docstore id, backed by the same SQLite file.
+    """
+
+    def __init__(self, conn, lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __getitem__(self, position):
+        with self.lock:
+            row = self.conn.execute("SELECT id FROM positions WHERE position = ?", (int(position),)).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __setitem__(self, position, id_):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO positions (position, id) VALUES (?, ?)", (int(position), id_))
+
+    def __delitem__(self, position):
+        with self.lock:
+            deleted = self.conn.execute("DELETE FROM positions WHERE position = ?", (int(position),)).rowcount
+        if not deleted:
+            raise KeyError(position)
+
+    def __iter__(self):
+        with self.lock:
+            positions = [row[0] for row in self.conn.execute("SELECT position FROM positions ORDER BY position")]
+        return iter(positions)
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def items(self):
+        with self.lock:
+            return list(self.conn.execute("SELECT position, id FROM positions ORDER BY position"))
+
+    def update(self, other=(), **kwargs):
+        rows = [(int(position), id_) for position, id_ in dict(other, **kwargs).items()]
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO positions (position, id) VALUES (?, ?)", rows)
+
+
+def _attach(path, readonly):
+    conn = _connect(path, readonly)
+    lock = threading.RLock()
+    return SqliteDocstore(conn, lock, os.path.abspath(path)), PositionMap(conn, lock)
+
+
+def migrate_pickle(folder):
+    """
+    Convert a folder saved by FAISS.save_local (index.pkl) to the SQLite chunk store.
+
+    This unpickles index.pkl once, so only run it on folders this app wrote
+    itself. The pickle is kept as index.pkl.bak. Returns False if there was
+    nothing to migrate.
+    """
+    pickle_path = os.path.join(folder, LEGACY_DOCSTORE_FILE)
+    if not os.path.exists(pickle_path) or os.path.exists(os.path.join(folder, CHUNKS_FILE)):
+        return False
+    with open(pickle_path, "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    _write_chunks(folder, [
+        (position, id_, docstore.search(id_)) for position, id_ in sorted(index_to_docstore_id.items())
+    ])
+    os.replace(pickle_path, pickle_path + ".bak")
+    return True
+
+
+def _write_chunks(folder, entries):
+    tmp_path = os.path.join(folder, CHUNKS_FILE + ".tmp")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = _connect(tmp_path)
+    with conn:
+        for position, id_, doc in entries:
+            conn.execute(
+                "INSERT INTO chunks (id, content, metadata) VALUES (?, ?, ?)",
+                (id_, doc.page_content, json.dumps(doc.metadata)),
+            )
+            conn.execute("INSERT INTO positions (position, id) VALUES (?, ?)", (position, id_))
+    conn.close()
+    os.replace(tmp_path, os.path.join(folder, CHUNKS_FILE))
+
+
+def load_local(folder, embeddings, mmap=True, writable=False):
+    """
+    Open a store saved by `save_local`: a faiss index plus the SQLite chunk store.
+
+    Load time and memory do not depend on the number of chunks: the index is
+    memory-mapped and chunk texts stay on disk until a search returns them.
+    With `writable=True` the index is read into RAM and the chunk store is
+    opened on a scratch copy, so readers of the folder keep a consistent view
+    until `save_local` swaps the new files in. Folders still holding a pickled
+    docstore are migrated first.
+    """
+    with span("load", writable=writable) as current:
+        migrate_pickle(folder)
+        chunks_path = os.path.join(folder, CHUNKS_FILE)
+        index_path = os.path.join(folder, INDEX_FILE)
+        current.set(bytes=os.path.getsize(chunks_path) + os.path.getsize(index_path))
+        if writable:
+            scratch_path = chunks_path + ".tmp"
+            shutil.copyfile(chunks_path, scratch_path)
+            chunks_path = scratch_path
+        docstore, positions = _attach(chunks_path, readonly=not writable)
+        index = read_index(index_path, mmap=mmap and not writable)
+        return FAISS(embeddings, index, docstore, positions)
+
+
+def close(vector_store):
+    """
+    Release the files a store opened by `load_local` holds: the chunk store connection and the memory-mapped index.
+    """
+    docstore = vector_store.docstore
+    if isinstance(docstore, SqliteDocstore):
+        with docstore.lock:
+            docstore.conn.close()
+    vector_store.index = None
+
+
+def iter_texts(folder):
+    """
+    Yield the chunk texts of a saved store in FAISS position order, one row at a time.
+    """
+    conn = _connect(os.path.join(folder, CHUNKS_FILE), readonly=True)
+    try:
+        rows = conn.execute("SELECT c.content FROM positions p JOIN chunks c ON c.id = p.id ORDER BY p.position")
+        for (content,) in rows:
+            yield content
+    finally:
+        conn.close()
+
+
+def create_local(folder, embeddings, dimension):
+    """
+    Start an empty writable store for `folder`: a flat index plus a scratch chunk store.
+
+    Chunks added to it go straight to SQLite, so building a large corpus in
+    batches keeps only the vectors in memory. Nothing is visible to readers of
+    the folder until `save_local`.
+    """
+    os.makedirs(folder, exist_ok=True)
+    scratch_path = os.path.join(folder, CHUNKS_FILE + ".tmp")
+    if os.path.exists(scratch_path):
+        os.remove(scratch_path)
+    docstore, positions = _attach(scratch_path, readonly=False)
+    return FAISS(embeddings, faiss.IndexFlatL2(dimension), docstore, positions)
+
+
+def save_local(vector_store, folder):
+    """
+    Save a FAISS store as index.faiss plus chunks.sqlite, replacing the previous files atomically.
+    """
+    os.makedirs(folder, exist_ok=True)
+    index_tmp = os.path.join(folder, INDEX_FILE + ".tmp")
+    faiss.write_index(vector_store.index, index_tmp)
+
+    docstore = vector_store.docstore
+    scratch_path = os.path.join(folder, CHUNKS_FILE + ".tmp")
+    if isinstance(docstore, SqliteDocstore) and docstore.path == os.path.abspath(scratch_path):
+        # Writable store opened by load_local: rewrite the positions (delete() renumbers them) and swap the copy in.
+        # Read them first, the mapping may be the PositionMap over the very table being rewritten
+        positions = [(int(position), id_) for position, id_ in vector_store.index_to_docstore_id.items()]
+        with docstore.lock, docstore.conn:
+            docstore.conn.execute("DELETE FROM positions")
+            docstore.conn.executemany("INSERT INTO positions (position, id) VALUES (?, ?)", positions)
+        docstore.conn.close()
+        os.replace(scratch_path, os.path.join(folder, CHUNKS_FILE))
+    else:
+        _write_chunks(folder, (
+            (position, id_, docstore.search(id_))
+            for position, id_ in sorted(vector_store.index_to_docstore_id.items())
+        ))
+    os.replace(index_tmp, os.path.join(folder, INDEX_FILE))
+    legacy_path = os.path.join(folder, LEGACY_DOCSTORE_FILE)
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+from common.tracing import count_tokens, span
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "embeddings.sqlite")
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def normalize_text(text):
+    """
+    Collapse whitespace so formatting-only differences share a cache entry.
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of float32 embedding vectors keyed by (model, normalized text hash).
+
+    The cache is shared by every thread in the process. When the stored vectors
+    grow past `max_bytes`, the least recently used entries are evicted until the
+    cache is back under 90% of the limit.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=512 * 1024 * 1024):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model, hashes):
+        """
+        Return a dict of hash -> vector for the hashes that are cached.
+        """
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self.lock:
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for hash_, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[hash_] = vector.tolist()
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, hash_) for hash_ in found],
+                )
+                self.conn.commit()
+            self.hits += sum(1 for hash_ in hashes if hash_ in found)
+            self.misses += sum(1 for hash_ in hashes if hash_ not in found)
+        return found
+
+    def put_many(self, model, items):
+        """
+        Store (hash, vector) pairs, then evict old entries if the cache is over its size limit.
+        """
+        now = time.time()
+        rows = [(model, hash_, array("f", vector).tobytes(), now) for hash_, vector in items]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.commit()
+            self.total_bytes += sum(len(row[2]) for row in rows)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        target = int(self.max_bytes * 0.9)
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        cursor = self.conn.execute("SELECT model, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_used")
+        to_delete = []
+        while self.total_bytes > target:
+            row = cursor.fetchone()
+            if row is None:
+                break
+            to_delete.append(row[:2])
+            self.total_bytes -= row[2]
+        cursor.close()
+        self.conn.executemany("DELETE FROM embeddings WHERE model = ? AND text_hash = ?", to_delete)
+        self.conn.commit()
+        self.evictions += len(to_delete)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes": self.total_bytes,
+            }
+
+
+def get_default_cache():
+    """
+    Return the process-wide embedding cache configured by EMBEDDING_CACHE_PATH and EMBEDDING_CACHE_MAX_MB.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache(
+                os.getenv("EMBEDDING_CACHE_PATH") or DEFAULT_CACHE_PATH,
+                int(os.getenv("EMBEDDING_CACHE_MAX_MB", 512)) * 1024 * 1024,
+            )
+        return _default_cache
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrap an embeddings client so only texts missing from the cache are sent to it.
+
+    Query embeddings are cached under a separate key because providers such as
+    Gemini embed queries and documents with different task types.
+    """
+
+    def __init__(self, embeddings, cache, model_name):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        with span("embed", texts=len(texts)) as current:
+            hashes = [text_hash(text) for text in texts]
+            found = self.cache.get_many(self.model_name, hashes)
+            missing = {}
+            for hash_, text in zip(hashes, texts):
+                if hash_ not in found:
+                    missing.setdefault(hash_, text)
+            current.set(cached=len(texts) - len(missing))
+            if missing:
+                current.set(
+                    bytes=sum(len(text.encode("utf-8")) for text in missing.values()),
+                    tokens=sum(count_tokens(text) for text in missing.values()),
+                )
+                vectors = self.embeddings.embed_documents(list(missing.values()))
+                new_items = list(zip(missing.keys(), vectors))
+                self.cache.put_many(self.model_name, new_items)
+                found.update(new_items)
+            return [found[hash_] for hash_ in hashes]
+
+    def embed_query(self, text):
+        model = f"{self.model_name}:query"
+        with span("embed", texts=1) as current:
+            hash_ = text_hash(text)
+            found = self.cache.get_many(model, [hash_])
+            if hash_ in found:
+                current.set(cached=1)
+                return found[hash_]
+            current.set(cached=0, bytes=len(text.encode("utf-8")), tokens=count_tokens(text))
+            vector = self.embeddings.embed_query(text)
+            self.cache.put_many(model, [(hash_, vector)])
+            return vector
@@ -0,0 +1,189 @@
+import hashlib
+import math
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from langchain_core.embeddings import Embeddings
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket allowing `rate` acquisitions per second with bursts of up to `burst`.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, math.ceil(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token if one is available and return 0, otherwise return the seconds until one will be.
+
+        Callers that must not block a thread (e.g. asyncio tasks) sleep for the
+        returned time themselves and try again.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """
+        Block until a token is available, then take it.
+        """
+        while True:
+            wait_time = self.reserve()
+            if not wait_time:
+                return
+            time.sleep(wait_time)
+
+
+def call_with_retry(func, max_retries=5, base_delay=1.0, max_delay=30.0, rate_limiter=None):
+    """
+    Call `func`, retrying failures with exponential backoff and full jitter.
+    """
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            return func()
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+class BatchEmbeddings(Embeddings):
+    """
+    Wrap an embeddings client so documents are embedded in concurrent batches.
+
+    Batches are sent over a bounded thread pool with at most `max_in_flight`
+    batches submitted at a time, every request goes through the rate limiter,
+    and failed batches are retried with jittered backoff. `progress` is called
+    as `progress(done, total)` from the calling thread as batches complete, so
+    it is safe to update Streamlit elements from it.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        batch_size=100,
+        max_workers=4,
+        requests_per_second=None,
+        max_retries=5,
+        base_delay=1.0,
+        max_delay=30.0,
+        max_in_flight=None,
+        progress=None,
+    ):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_second) if requests_per_second else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_in_flight = max_in_flight or 2 * max_workers
+        self.progress = progress
+
+    @classmethod
+    def from_env(cls, embeddings, **kwargs):
+        """
+        Build a BatchEmbeddings configured from EMBEDDING_* environment variables.
+        """
+        rps = os.getenv("EMBEDDING_REQUESTS_PER_SECOND")
+        settings = {
+            "batch_size": int(os.getenv("EMBEDDING_BATCH_SIZE", 100)),
+            "max_workers": int(os.getenv("EMBEDDING_MAX_WORKERS", 4)),
+            "requests_per_second": float(rps) if rps else None,
+            "max_retries": int(os.getenv("EMBEDDING_MAX_RETRIES", 5)),
+        }
+        settings.update(kwargs)
+        return cls(embeddings, **settings)
+
+    def _call(self, func):
+        return call_with_retry(func, self.max_retries, self.base_delay, self.max_delay, self.rate_limiter)
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        results = [None] * len(texts)
+        batches = iter(range(0, len(texts), self.batch_size))
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+
+            def submit_next():
+                start = next(batches, None)
+                if start is None:
+                    return False
+                batch = texts[start:start + self.batch_size]
+                future = executor.submit(self._call, lambda: self.embeddings.embed_documents(batch))
+                pending[future] = (start, len(batch))
+                return True
+
+            while len(pending) < self.max_in_flight and submit_next():
+                pass
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    start, size = pending.pop(future)
+                    results[start:start + size] = future.result()
+                    done += size
+                    if self.progress is not None:
+                        self.progress(done, len(texts))
+                    submit_next()
+        return results
+
+    def embed_query(self, text):
+        return self._call(lambda: self.embeddings.embed_query(text))
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic local embedder for offline benchmarks.
+
+    Words are feature-hashed into a fixed-size, L2-normalized vector, so texts
+    sharing vocabulary land close together. `latency` seconds are slept per
+    call (plus `latency_per_text` per text) to simulate a remote provider.
+    """
+
+    def __init__(self, size=768, latency=0.0, latency_per_text=0.0):
+        self.size = size
+        self.latency = latency
+        self.latency_per_text = latency_per_text
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.size] += 1.0 if value >> 63 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def _simulate(self, count):
+        with self.lock:
+            self.calls += 1
+        if self.latency or self.latency_per_text:
+            time.sleep(self.latency + self.latency_per_text * count)
+
+    def embed_documents(self, texts):
+        self._simulate(len(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self._simulate(1)
+        return self._embed(text)
@@ -0,0 +1,162 @@
+import os
+
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+
+from common import chunk_store
+from common.mmr import mmr_select, mmr_settings_from_env, normalize_rows
+from common.tracing import count_tokens, span
+
+
+def fast_path_ratio_from_env():
+    """
+    Return HYBRID_FAST_PATH_RATIO: how far the best BM25 score must lead the runner-up to skip embedding (0 disables).
+    """
+    return float(os.getenv("HYBRID_FAST_PATH_RATIO", "2.0"))
+
+
+class HybridSearch:
+    """
+    Search a FAISS store together with its BM25 lexical index, fusing both rankings.
+
+    The top `candidates` of each ranking are merged by reciprocal rank fusion.
+    When the lexical result is confident on its own (the best chunk contains
+    every query term and its score leads the next one by `fast_path_ratio`), it
+    is returned directly and the query is never embedded. Keyword queries often
+    match fewer than k chunks; the rest are then the nearest neighbours of the
+    best chunk's stored vector, so the fast path still returns k chunks. Indexes
+    that cannot give vectors back (IVF) take the fused search instead. Without
+    a lexical index this is plain vector search.
+
+    With `fetch_k`, the top `fetch_k` results are re-ranked by maximal marginal
+    relevance so overlapping chunks do not crowd the context, and the picks are
+    kept within `token_budget` tokens when one is set.
+    """
+
+    def __init__(self, vector_store, lexical=None, candidates=50, rrf_k=60, fast_path_ratio=2.0,
+                 fetch_k=0, lambda_mult=0.7, token_budget=0):
+        self.vector_store = vector_store
+        self.lexical = lexical
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.fast_path_ratio = fast_path_ratio
+        self.fetch_k = fetch_k
+        self.lambda_mult = lambda_mult
+        self.token_budget = token_budget
+
+    @classmethod
+    def from_env(cls, vector_store, lexical=None):
+        fetch_k, lambda_mult, token_budget = mmr_settings_from_env()
+        return cls(
+            vector_store, lexical, fast_path_ratio=fast_path_ratio_from_env(),
+            fetch_k=fetch_k, lambda_mult=lambda_mult, token_budget=token_budget,
+        )
+
+    def close(self):
+        """
+        Release the index files held open, so a save can replace them.
+        """
+        chunk_store.close(self.vector_store)
+        self.lexical = None
+
+    @property
+    def embeddings(self):
+        return self.vector_store.embeddings
+
+    @property
+    def index(self):
+        return self.vector_store.index
+
+    def lexical_confident(self, hits):
+        if not self.fast_path_ratio or not len(hits.positions) or hits.matched < hits.terms:
+            return False
+        return len(hits.scores) == 1 or hits.scores[0] >= self.fast_path_ratio * hits.scores[1]
+
+    def search(self, query, k=4, embedding=None):
+        """
+        Return (documents, embedded) for the top-k chunks; `embedded` is False when the lexical fast path answered.
+
+        Pass `embedding` when the query vector is already known to reuse it.
+        """
+        with span("search", k=k) as current:
+            hits = self.lexical.search(query, self.candidates) if self.lexical is not None else None
+            if embedding is None and hits is not None and self.lexical_confident(hits):
+                if len(hits.positions) >= min(k, self.index.ntotal):
+                    current.set(fast_path=True)
+                    # The query has no embedding here, so BM25 scores stand in for relevance
+                    return self._rerank(hits.positions, hits.scores / hits.scores[0], k), False
+                stand_in = self._stored_vector(hits.positions[0])
+                if stand_in is not None:
+                    current.set(fast_path=True)
+                    # Fill the remaining slots with the neighbours of the best hit, ranked after the hits
+                    _, dense = self.index.search(stand_in[None], max(self.fetch_k, k) + len(hits.positions))
+                    positions = list(dict.fromkeys(hits.positions.tolist() + dense[0][dense[0] >= 0].tolist()))
+                    return self._rerank(positions, None, k, stand_in), False
+            current.set(fast_path=False)
+            if embedding is None:
+                embedding = self.embeddings.embed_query(query)
+
+            _, dense = self.index.search(np.asarray([embedding], dtype=np.float32), self.candidates)
+            rankings = [dense[0][dense[0] >= 0]]
+            if hits is not None:
+                rankings.append(hits.positions)
+            fused = {}
+            for positions in rankings:
+                for rank, position in enumerate(positions.tolist()):
+                    fused[position] = fused.get(position, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+            return self._rerank(sorted(fused, key=fused.get, reverse=True), None, k, embedding), True
+
+    def _rerank(self, positions, relevance, k, embedding=None):
+        """
+        Return the documents of the best `k` positions, or of the MMR picks among the first `fetch_k`.
+
+        Without `relevance`, candidates are scored by cosine similarity to `embedding`.
+        """
+        if not self.fetch_k or len(positions) <= 1:
+            return self._documents(positions[:k])
+        positions = np.asarray(positions[:max(self.fetch_k, k)], dtype=np.int64)
+        documents = self._documents(positions)
+        vectors = self._vectors(positions, documents)
+        if relevance is None:
+            relevance = normalize_rows(vectors) @ normalize_rows([embedding])[0]
+        costs = [count_tokens(document.page_content) for document in documents]
+        picks = mmr_select(relevance[:len(positions)], vectors, k, self.lambda_mult, costs, self.token_budget)
+        return [documents[i] for i in picks]
+
+    def _stored_vector(self, position):
+        # IVF indexes have no direct map to reconstruct from
+        try:
+            return self.index.reconstruct(int(position))
+        except RuntimeError:
+            return None
+
+    def _vectors(self, positions, documents):
+        # Flat and HNSW indexes give their vectors back; others re-embed, which the embedding cache answers
+        try:
+            return self.index.reconstruct_batch(positions)
+        except RuntimeError:
+            return np.asarray(self.embeddings.embed_documents([document.page_content for document in documents]), dtype=np.float32)
+
+    def _documents(self, positions):
+        return [
+            self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[int(position)])
+            for position in positions
+        ]
+
+    def as_retriever(self, k=4):
+        return HybridRetriever(hybrid=self, k=k)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Langchain retriever over a HybridSearch, for use in retrieval chains.
+    """
+
+    hybrid: HybridSearch
+    k: int = 4
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        return self.hybrid.search(query, self.k)[0]
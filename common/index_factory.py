@@ -0,0 +1,185 @@
+import math
+import os
+import uuid
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+INDEX_MODES = ("flat", "ivf", "hnsw", "sq8", "ivf-sq8", "pq", "ivf-pq")
+
+# Smallest corpus each trained mode is built for; smaller corpora get an exact flat index
+MIN_TRAINING_POINTS = {"ivf": 1000, "ivf-sq8": 1000, "pq": 10000, "ivf-pq": 10000}
+
+# Flat codes (flat, SQ, PQ, HNSW storage) are mapped with IO_FLAG_MMAP_IFC, IVF inverted lists with IO_FLAG_MMAP;
+# faiss rejects the combination for IVF indexes, so those fall back to IO_FLAG_MMAP alone
+MMAP_FLAGS = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY
+IVF_MMAP_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+
+def index_mode_from_env():
+    mode = os.getenv("FAISS_INDEX_MODE", "flat").lower()
+    if mode not in INDEX_MODES:
+        raise ValueError(f"Unknown FAISS_INDEX_MODE '{mode}', expected one of {', '.join(INDEX_MODES)}")
+    return mode
+
+
+def factory_string(mode, dimension, count):
+    """
+    Return the faiss index_factory description for a mode, dimension and number of training vectors.
+    """
+    if count < MIN_TRAINING_POINTS.get(mode, 0):
+        mode = "flat"
+    nlist = max(1, min(int(4 * math.sqrt(count)), count // 39))
+    # Four dimensions per one-byte PQ code (16x smaller than float32) keeps recall usable
+    subquantizers = max(m for m in range(1, dimension // 4 + 1) if dimension % m == 0) if dimension >= 4 else dimension
+    return {
+        "flat": "Flat",
+        "ivf": f"IVF{nlist},Flat",
+        "hnsw": "HNSW32",
+        "sq8": "SQ8",
+        "ivf-sq8": f"IVF{nlist},SQ8",
+        "pq": f"PQ{subquantizers}",
+        "ivf-pq": f"IVF{nlist},PQ{subquantizers}",
+    }[mode]
+
+
+def tune_search(index, nprobe=None, ef_search=128):
+    """
+    Set query-time parameters: probe 1/16 of the IVF lists by default and widen the HNSW beam.
+    """
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        ivf.nprobe = nprobe or max(1, ivf.nlist // 16)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+    return index
+
+
+def build_index(vectors, mode="flat"):
+    """
+    Build, train and fill a faiss index of the given mode from an (n, d) array of vectors.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = faiss.index_factory(vectors.shape[1], factory_string(mode, vectors.shape[1], len(vectors)))
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return tune_search(index)
+
+
+def matches_mode(index, mode):
+    """
+    Return whether the index is of the type `mode` would build for its current size.
+
+    False means the store should be rebuilt, e.g. a small corpus that was indexed
+    flat has grown enough to train IVF centroids, or FAISS_INDEX_MODE changed.
+    """
+    expected = faiss.index_factory(index.d, factory_string(mode, index.d, index.ntotal))
+    return isinstance(index, type(expected))
+
+
+def saved_matches_mode(path, mode):
+    """
+    Return whether the index saved at `path` matches `mode` (see `matches_mode`), reading it memory-mapped.
+    """
+    index = read_index(path)
+    return not index.ntotal or matches_mode(index, mode)
+
+
+def supports_removal(index):
+    """
+    Return whether vectors can be deleted from the index in place.
+
+    HNSW graphs cannot remove vectors at all. IVF indexes can, but keep the
+    remaining vectors' ids, while langchain's FAISS.delete renumbers the
+    position -> docstore id map from 0, so both are rebuilt instead.
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        return False
+    try:
+        faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return True
+    return False
+
+
+def from_embeddings(texts, vectors, embeddings, mode="flat", metadatas=None, ids=None):
+    """
+    Create a langchain FAISS store over precomputed vectors using an index of the given mode.
+    """
+    ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+    metadatas = metadatas or [{} for _ in texts]
+    docstore = InMemoryDocstore({
+        id_: Document(page_content=text, metadata=metadata) for id_, text, metadata in zip(ids, texts, metadatas)
+    })
+    index = build_index(np.asarray(vectors, dtype=np.float32), mode)
+    return FAISS(embeddings, index, docstore, dict(enumerate(ids)))
+
+
+def from_texts(texts, embeddings, mode="flat", metadatas=None, ids=None):
+    texts = list(texts)
+    return from_embeddings(texts, embeddings.embed_documents(texts), embeddings, mode, metadatas, ids)
+
+
+def from_documents(documents, embeddings, mode="flat", ids=None):
+    documents = list(documents)
+    return from_texts(
+        [doc.page_content for doc in documents],
+        embeddings,
+        mode,
+        [doc.metadata for doc in documents],
+        ids,
+    )
+
+
+def rebuild(vector_store, embeddings, mode="flat", exclude_ids=()):
+    """
+    Rebuild a store from its own documents, minus `exclude_ids`, retraining the index.
+
+    Used when vectors must be removed from an index that cannot delete in place,
+    or to retrain centroids after the corpus has grown. Embeddings are served
+    from the embedding cache when one wraps `embeddings`.
+    """
+    excluded = set(exclude_ids)
+    ids = [id_ for _, id_ in sorted(vector_store.index_to_docstore_id.items()) if id_ not in excluded]
+    docs = [vector_store.docstore.search(id_) for id_ in ids]
+    return from_documents(docs, embeddings, mode, ids)
+
+
+def retrain(vector_store, embeddings, mode="flat", batch_size=1024):
+    """
+    Replace the store's index with a freshly trained one of `mode`, keeping its chunks and ids.
+
+    Unlike `rebuild`, documents are never materialized all at once: vectors are
+    copied out of a flat index, or re-embedded (from the embedding cache when
+    one wraps `embeddings`) in batches of `batch_size` chunks otherwise.
+    """
+    index = vector_store.index
+    if isinstance(index, faiss.IndexFlat):
+        vectors = index.reconstruct_n(0, index.ntotal)
+    else:
+        ids = [id_ for _, id_ in sorted(vector_store.index_to_docstore_id.items())]
+        vectors = np.empty((len(ids), index.d), dtype=np.float32)
+        for start in range(0, len(ids), batch_size):
+            texts = [vector_store.docstore.search(id_).page_content for id_ in ids[start:start + batch_size]]
+            vectors[start:start + len(texts)] = embeddings.embed_documents(texts)
+    vector_store.index = build_index(vectors, mode)
+    return vector_store
+
+
+def read_index(path, mmap=True):
+    """
+    Read a saved faiss index, memory-mapped (read-only) unless `mmap` is False.
+    """
+    if not mmap:
+        return tune_search(faiss.read_index(path))
+    try:
+        return tune_search(faiss.read_index(path, MMAP_FLAGS))
+    except RuntimeError:
+        return tune_search(faiss.read_index(path, IVF_MMAP_FLAGS))
@@ -0,0 +1,65 @@
+from langchain_core.callbacks import BaseCallbackHandler
+
+from common.tracing import Span, count_tokens, current_span, get_tracer
+
+
+class SpanCallbackHandler(BaseCallbackHandler):
+    """
+    Langchain callback handler recording prompt formatting and LLM calls of a chain run as spans.
+
+    Pass a fresh instance per run: `chain.invoke(inputs, config={"callbacks": [SpanCallbackHandler()]})`.
+    The "llm" span marks "first_token" when the model streams, and records the
+    provider's token usage when it reports one (word counts otherwise).
+    """
+
+    def __init__(self):
+        self.spans = {}
+
+    def _start(self, run_id, name, **attributes):
+        self.spans[run_id] = Span(name, current_span(), attributes)
+
+    def _end(self, run_id, **attributes):
+        span = self.spans.pop(run_id, None)
+        if span is not None:
+            span.set(**attributes)
+            get_tracer().finish(span)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or ""
+        if name.endswith("PromptTemplate"):
+            self._start(run_id, "prompt")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self.spans:
+            text = outputs.to_string() if hasattr(outputs, "to_string") else str(outputs)
+            self._end(run_id, chars=len(text), tokens=count_tokens(text))
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm", prompt_tokens=sum(count_tokens(prompt) for prompt in prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        text = " ".join(str(message.content) for batch in messages for message in batch)
+        self._start(run_id, "llm", prompt_tokens=count_tokens(text))
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self.spans.get(run_id)
+        if span is not None:
+            span.mark("first_token")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self.spans.get(run_id)
+        if span is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage.get("prompt_tokens"):
+            span.set(prompt_tokens=usage["prompt_tokens"])
+        output_tokens = usage.get("completion_tokens") or sum(
+            count_tokens(generation.text) for generations in response.generations for generation in generations
+        )
+        self._end(run_id, output_tokens=output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter, namedtuple
+from array import array
+
+import numpy as np
+
+from common import chunk_store
+
+LEXICAL_FILE = "lexical.bin"
+MAGIC = b"BM25IDX1"
+ALIGNMENT = 64
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from had has have how i if in into is it its me my no not of on or
+our so such than that the their them then there these they this to was we were what when where which who why will
+with you your
+""".split())
+
+# Terms in more than this share of chunks only rescore the candidates of rarer terms instead of adding their own
+COMMON_TERM_RATIO = 0.05
+
+LexicalHits = namedtuple("LexicalHits", "positions scores terms matched")
+
+
+def tokenize(text):
+    """
+    Lowercase word tokens of a text, without stopwords.
+    """
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def term_hash(term):
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over the chunks of a vector store, addressed by FAISS position.
+
+    Terms are stored as sorted 64-bit hashes with the start and length of their
+    postings; postings are int32 positions with uint16 term frequencies. All
+    arrays live in one file and are memory-mapped on load, so opening an index
+    costs nothing and a query only touches the postings of its own terms.
+    """
+
+    def __init__(self, terms, starts, df, postings, tfs, lengths, k1=1.2, b=0.75):
+        self.terms = terms
+        self.starts = starts
+        self.df = df
+        self.postings = postings
+        self.tfs = tfs
+        self.lengths = lengths
+        self.k1 = k1
+        self.b = b
+        self.average_length = float(lengths.mean()) if len(lengths) and lengths.any() else 1.0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @classmethod
+    def build(cls, texts):
+        """
+        Build an index from chunk texts given in position order.
+        """
+        vocabulary = {}
+        term_ids, doc_ids, tfs, lengths = array("i"), array("i"), array("H"), array("i")
+        for position, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                doc_ids.append(position)
+                tfs.append(min(tf, 0xFFFF))
+
+        term_ids = np.frombuffer(term_ids, dtype=np.int32)
+        # Positions were appended in order, so a stable sort by term keeps each postings list sorted
+        order = np.argsort(term_ids, kind="stable")
+        df = np.bincount(term_ids, minlength=len(vocabulary)).astype(np.int32)
+        starts = np.zeros(len(vocabulary), dtype=np.int64)
+        np.cumsum(df[:-1], dtype=np.int64, out=starts[1:])
+        hashes = np.fromiter((term_hash(term) for term in vocabulary), dtype=np.uint64, count=len(vocabulary))
+        by_hash = np.argsort(hashes)
+        return cls(
+            hashes[by_hash],
+            starts[by_hash],
+            df[by_hash],
+            np.frombuffer(doc_ids, dtype=np.int32)[order],
+            np.frombuffer(tfs, dtype=np.uint16)[order],
+            np.frombuffer(lengths, dtype=np.int32).copy(),
+        )
+
+    def save(self, path):
+        """
+        Write the index to one file, replacing any previous one atomically.
+        """
+        arrays = {
+            "terms": self.terms, "starts": self.starts, "df": self.df,
+            "postings": self.postings, "tfs": self.tfs, "lengths": self.lengths,
+        }
+        layout, offset = {}, 0
+        for name, values in arrays.items():
+            layout[name] = [values.dtype.str, len(values), offset]
+            offset += -(-values.nbytes // ALIGNMENT) * ALIGNMENT
+        header = json.dumps({"k1": self.k1, "b": self.b, "arrays": layout}).encode("utf-8")
+        data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + len(header).to_bytes(8, "little") + header)
+            for name, values in arrays.items():
+                f.seek(data_start + layout[name][2])
+                f.write(np.ascontiguousarray(values).tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map an index written by `save`, or return None if there is none.
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{path}' is not a lexical index")
+            header_size = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_size))
+        data_start = -(-(len(MAGIC) + 8 + header_size) // ALIGNMENT) * ALIGNMENT
+        arrays = {}
+        for name, (dtype, count, offset) in header["arrays"].items():
+            arrays[name] = (
+                np.memmap(path, dtype=np.dtype(dtype), mode="r", offset=data_start + offset, shape=(count,))
+                if count else np.empty(0, dtype=np.dtype(dtype))
+            )
+        return cls(**arrays, k1=header["k1"], b=header["b"])
+
+    def _lookup(self, terms):
+        hashes = np.array([term_hash(term) for term in terms], dtype=np.uint64)
+        slots = np.searchsorted(self.terms, hashes)
+        found = slots < len(self.terms)
+        found[found] = self.terms[slots[found]] == hashes[found]
+        return slots[found]
+
+    def search(self, query, k=50):
+        """
+        Return the top-k chunks for a query by BM25 as LexicalHits.
+
+        `terms` is the number of distinct query terms and `matched` how many of
+        them the best chunk contains, which callers use to judge confidence.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        empty = LexicalHits(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), len(terms), 0)
+        if not terms or not len(self):
+            return empty
+        slots = self._lookup(terms)
+        if not len(slots):
+            return empty
+
+        df = self.df[slots].astype(np.int64)
+        common = df > COMMON_TERM_RATIO * len(self)
+        if common.all():
+            common[:] = False
+        postings, contributions, candidates = [], [], None
+        # Rare terms first: they pick the candidates, common terms then only score those
+        for slot, is_common in zip(np.concatenate([slots[~common], slots[common]]), sorted(common)):
+            start, count = int(self.starts[slot]), int(self.df[slot])
+            docs = self.postings[start:start + count]
+            offsets = None
+            if is_common:
+                if candidates is None:
+                    candidates = np.unique(np.concatenate(postings))
+                offsets = np.searchsorted(docs, candidates)
+                present = offsets < count
+                present[present] = docs[offsets[present]] == candidates[present]
+                docs, offsets = candidates[present], offsets[present]
+            tf = (self.tfs[start:start + count] if offsets is None else self.tfs[start + offsets]).astype(np.float32)
+            idf = math.log(1 + (len(self) - count + 0.5) / (count + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[docs] / self.average_length)
+            postings.append(np.asarray(docs))
+            contributions.append(idf * tf * (self.k1 + 1) / (tf + norm))
+
+        candidates, inverse = np.unique(np.concatenate(postings), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contributions)).astype(np.float32)
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        best = candidates[top[0]]
+        matched = 0
+        for docs in postings:
+            i = np.searchsorted(docs, best)
+            matched += int(i < len(docs) and docs[i] == best)
+        return LexicalHits(candidates[top].astype(np.int64), scores[top], len(terms), matched)
+
+
+def build_local(folder):
+    """
+    Build the lexical index of a saved store from its chunk store and save it beside the FAISS index.
+    """
+    index = LexicalIndex.build(chunk_store.iter_texts(folder))
+    index.save(os.path.join(folder, LEXICAL_FILE))
+    return index
+
+
+def load_local(folder, build_missing=False):
+    """
+    Memory-map the lexical index of a saved store; with `build_missing`, build it first for stores saved without one.
+    """
+    index = LexicalIndex.load(os.path.join(folder, LEXICAL_FILE))
+    if index is None and build_missing and os.path.exists(os.path.join(folder, chunk_store.CHUNKS_FILE)):
+        index = build_local(folder)
+    return index
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+
+MANIFEST_FILE = "manifest.json"
+
+
+def hash_bytes(data):
+    """
+    Return the SHA-256 hex digest of raw file bytes.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path, block_size=1 << 20):
+    """
+    Return the SHA-256 hex digest of a file, read in blocks so large files are never held in memory.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(source, chunk):
+    """
+    Return a stable id for a chunk of text coming from the given source file.
+    """
+    return hashlib.sha256(f"{source}\0{chunk}".encode("utf-8")).hexdigest()
+
+
+class IndexManifest:
+    """
+    Per-file and per-chunk content hashes stored beside a FAISS index.
+
+    Each file entry records the hash of the file bytes and the docstore ids of
+    the chunks it contributed, so re-ingestion can skip unchanged files, add
+    only new chunks and delete the chunks of changed or removed files. Entries
+    for files read from disk can also keep a (size, mtime) signature, so a scan
+    only hashes files whose signature changed.
+    """
+
+    def __init__(self, folder, files=None, version=0):
+        self.folder = folder
+        self.files = files or {}
+        self.version = version
+
+    @property
+    def path(self):
+        return os.path.join(self.folder, MANIFEST_FILE)
+
+    @classmethod
+    def load(cls, folder):
+        """
+        Load the manifest from a folder, or return an empty one if none exists.
+        """
+        path = os.path.join(folder, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return cls(folder)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(folder, data.get("files", {}), data.get("version", 0))
+
+    def save(self, bump=True):
+        """
+        Write the manifest atomically and bump its version stamp unless `bump` is False.
+        """
+        self.version += 1 if bump else 0
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    def file_hash(self, name):
+        entry = self.files.get(name)
+        return entry["sha256"] if entry else None
+
+    def chunk_ids(self, name):
+        entry = self.files.get(name)
+        return list(entry["chunks"]) if entry else []
+
+    def signature(self, name):
+        entry = self.files.get(name)
+        return tuple(entry["signature"]) if entry and entry.get("signature") else None
+
+    def update_file(self, name, file_hash, chunk_ids, signature=None):
+        self.files[name] = {"sha256": file_hash, "chunks": list(chunk_ids)}
+        if signature is not None:
+            self.files[name]["signature"] = list(signature)
+
+    def remove_file(self, name):
+        return self.files.pop(name, None)
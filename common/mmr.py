@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+
+def mmr_settings_from_env():
+    """
+    Return (fetch_k, lambda_mult, token_budget) from RETRIEVAL_FETCH_K, RETRIEVAL_MMR_LAMBDA and RETRIEVAL_TOKEN_BUDGET.
+
+    A fetch_k of 0 turns the re-ranking off, a budget of 0 leaves the context unbounded.
+    """
+    return (
+        int(os.getenv("RETRIEVAL_FETCH_K", "20")),
+        float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.7")),
+        int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "0")),
+    )
+
+
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def mmr_select(relevance, vectors, k, lambda_mult=0.7, costs=None, budget=0):
+    """
+    Pick up to k candidates by maximal marginal relevance and return their indices in selection order.
+
+    `relevance` scores each candidate against the query (higher is better) and
+    `vectors` are the candidate embeddings. Each step scores every remaining
+    candidate at once as `lambda_mult * relevance - (1 - lambda_mult) * max
+    similarity to the picks so far`, where the similarities to a new pick come
+    from one matrix-vector product, so the whole selection costs k passes over
+    the candidates instead of a full pairwise matrix. With a `budget`,
+    candidates whose `costs` (e.g. tokens) no longer fit are skipped, so the
+    picks always fit the budget.
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    count = len(relevance)
+    if not count or k <= 0:
+        return []
+    unit = normalize_rows(vectors)
+    costs = np.zeros(count) if costs is None else np.asarray(costs, dtype=np.float64)
+    remaining = float(budget) if budget else np.inf
+
+    # Highest similarity of each candidate to any pick; nothing is redundant before the first pick
+    redundancy = np.zeros(count, dtype=np.float32)
+    available = costs <= remaining
+    selected = []
+    while len(selected) < k and available.any():
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        similarity = unit @ unit[best]
+        redundancy = similarity if not selected else np.maximum(redundancy, similarity)
+        selected.append(best)
+        remaining -= costs[best]
+        available[best] = False
+        available &= costs <= remaining
+    return selected
@@ -0,0 +1,141 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+
+# Readers opened by this process, so consecutive page ranges of the same file are not re-parsed
+_readers = {}
+
+
+def _open(key, source):
+    reader = _readers.get(key)
+    if reader is None:
+        reader = PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+        _readers.clear()
+        _readers[key] = reader
+    return reader
+
+
+def _extract_range(key, source, start, stop):
+    reader = _open(key, source)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _plan(files, pages_per_task, folder=None):
+    for index, (name, source) in enumerate(files):
+        key = source if isinstance(source, str) else hashlib.blake2b(source, digest_size=16).hexdigest()
+        page_count = len(_open(key, source).pages)
+        if folder is not None and not isinstance(source, str):
+            # Written once here so workers read it from disk, instead of every range task pickling the bytes
+            path = os.path.join(folder, f"{index}.pdf")
+            with open(path, "wb") as f:
+                f.write(source)
+            key = source = path
+        for start in range(0, page_count, pages_per_task):
+            yield name, key, source, start, min(start + pages_per_task, page_count)
+
+
+def iter_pdf_pages(files, max_workers=None, pages_per_task=32, max_pending=None):
+    """
+    Yield (file name, page number, text) for every page of the given PDFs, in order.
+
+    `files` is an iterable of (name, source) pairs where source is a path or the
+    raw PDF bytes. Pages are extracted in ranges of `pages_per_task` over a
+    process pool, with at most `max_pending` ranges in flight, so memory is
+    bounded by the window rather than by the corpus size. PDFs given as bytes
+    are written to a temporary folder first, so a task carries only a path and
+    a page range and each worker loads a file once for all its ranges. With
+    `max_workers=0` pages are extracted in-process, which is cheaper for a
+    single short file.
+    """
+    if max_workers == 0:
+        for name, key, source, start, stop in _plan(files, pages_per_task):
+            for offset, text in enumerate(_extract_range(key, source, start, stop)):
+                yield name, start + offset + 1, text
+        _readers.clear()
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as folder, ProcessPoolExecutor(max_workers=max_workers) as executor:
+        tasks = _plan(files, pages_per_task, folder)
+        max_pending = max_pending or 2 * max_workers
+        pending = deque()
+        task = next(tasks, None)
+        while task is not None or pending:
+            while task is not None and len(pending) < max_pending:
+                name, key, source, start, stop = task
+                pending.append((name, start, executor.submit(_extract_range, key, source, start, stop)))
+                task = next(tasks, None)
+            name, start, future = pending.popleft()
+            for offset, text in enumerate(future.result()):
+                yield name, start + offset + 1, text
+    _readers.clear()
+
+
+def _chunk_starts(text, chunks, overlap):
+    # Same offset search as TextSplitter.create_documents with add_start_index
+    index, previous_length = 0, 0
+    for chunk in chunks:
+        index = text.find(chunk, max(0, index + previous_length - overlap))
+        previous_length = len(chunk)
+        yield index
+
+
+def _last_split_start(splitter, text, end):
+    """
+    Offset in `text` of the last point before `end` where the splitter's top-level split of `text` starts a piece.
+    """
+    separators = getattr(splitter, "_separators", None) or [getattr(splitter, "_separator", "")]
+    for separator in separators:
+        pattern = separator if splitter._is_separator_regex else re.escape(separator)
+        if separator == "" or re.search(pattern, text):
+            break
+    start = 0
+    for match in re.finditer(pattern, text[:end]):
+        start = match.end() if splitter._keep_separator == "end" else match.start()
+    return start
+
+
+def iter_text_chunks(texts, splitter, flush_size=50000):
+    """
+    Feed a stream of texts through a langchain text splitter incrementally.
+
+    Texts are concatenated into a buffer that is split each time another
+    `flush_size` characters have been added. The chunks before the piece of
+    the buffer (as the splitter divides it at its top-level separator) holding
+    the second to last chunk are yielded, and the raw text from the start of
+    that piece on is carried over as the start of the next buffer, so the
+    splitter sees the same pieces, whitespace included, as in the whole text.
+    This gives the same chunks as splitting the whole concatenated text at
+    once, as long as every buffer contains the separator the splitter would
+    pick for the whole text (true for PDF text with line breaks and
+    RecursiveCharacterTextSplitter's default separators).
+    """
+    parts, size, limit = [], 0, flush_size
+    for text in texts:
+        parts.append(text)
+        size += len(text)
+        if size >= limit:
+            limit = size + flush_size
+            buffer = "".join(parts)
+            chunks = splitter.split_text(buffer)
+            starts = list(_chunk_starts(buffer, chunks, splitter._chunk_overlap))
+            # The last chunk may change as text is added, and so may the one before it when the last piece
+            # turns out to be longer than a chunk, so both are split again with the next buffer
+            if len(chunks) < 3 or min(starts) < 0:
+                continue
+            carry = _last_split_start(splitter, buffer, starts[-2])
+            if carry == 0:
+                continue
+            yield from (chunk for chunk, start in zip(chunks, starts) if start < carry)
+            parts = [buffer[carry:]]
+            size = len(parts[0])
+            limit = size + flush_size
+    if parts:
+        yield from splitter.split_text("".join(parts))
@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+import pdf2image
+
+# Where the Windows setup instructions put poppler; used when POPPLER_PATH is unset and the folder exists
+WINDOWS_POPPLER_PATH = r"C:\poppler\bin"
+
+
+class PageRasterizer:
+    """
+    Render the first pages of a PDF to JPEG bytes with poppler, for sending a document to a vision model.
+
+    Only pages 1 to `max_pages` are rasterized (pdftoppm's first/last page
+    options), at `dpi` and in grayscale unless `grayscale` is False. Poppler
+    encodes the JPEGs itself into a temporary folder, so the calling process
+    never decodes a bitmap and holds only the PDF and the JPEG bytes. Pages are
+    split into contiguous ranges rendered concurrently by up to `workers`
+    pdftoppm processes.
+    """
+
+    def __init__(self, dpi=100, max_pages=2, grayscale=True, quality=80, workers=None, poppler_path=None, timeout=60):
+        self.dpi = dpi
+        self.max_pages = max_pages
+        self.grayscale = grayscale
+        self.quality = quality
+        self.workers = workers or os.cpu_count() or 1
+        if poppler_path is None and os.path.isdir(WINDOWS_POPPLER_PATH):
+            poppler_path = WINDOWS_POPPLER_PATH
+        self.poppler_path = poppler_path
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """
+        Build a PageRasterizer configured from ATS_PDF_* and POPPLER_PATH environment variables.
+        """
+        settings = {
+            "dpi": int(os.getenv("ATS_PDF_DPI", 100)),
+            "max_pages": int(os.getenv("ATS_PDF_MAX_PAGES", 2)),
+            "grayscale": os.getenv("ATS_PDF_GRAYSCALE", "1").lower() not in ("0", "false", "no"),
+            "quality": int(os.getenv("ATS_PDF_JPEG_QUALITY", 80)),
+            "workers": int(os.getenv("ATS_PDF_WORKERS", 0)) or None,
+            "poppler_path": os.getenv("POPPLER_PATH") or None,
+        }
+        settings.update(kwargs)
+        return cls(**settings)
+
+    def render(self, pdf):
+        """
+        Return the JPEG bytes of each rendered page of a PDF given as bytes, in page order.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            paths = pdf2image.convert_from_bytes(
+                pdf,
+                dpi=self.dpi,
+                first_page=1,
+                last_page=self.max_pages or None,
+                fmt="jpeg",
+                jpegopt={"quality": self.quality, "optimize": True, "progressive": False},
+                grayscale=self.grayscale,
+                output_folder=folder,
+                paths_only=True,
+                thread_count=self.workers,
+                poppler_path=self.poppler_path,
+                timeout=self.timeout,
+            )
+            pages = []
+            for path in paths:
+                with open(path, "rb") as f:
+                    pages.append(f.read())
+        return pages
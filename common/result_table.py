@@ -0,0 +1,146 @@
+import tempfile
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# Rows converted per record batch when exporting
+EXPORT_BATCH_ROWS = 65536
+
+
+def column_array(values):
+    """
+    Arrow array for one column of a page of SQLite rows; columns mixing types (SQLite allows it) are kept as text.
+    """
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if value is None else str(value) for value in values], pa.string())
+
+
+def common_type(types):
+    """
+    One type for the chunks of a column converted page by page: nulls take the other pages' type, integers
+    widen to reals, and anything else mixed becomes text.
+    """
+    types = {kind for kind in types if not pa.types.is_null(kind)}
+    if not types:
+        return pa.null()
+    if len(types) == 1:
+        return types.pop()
+    if all(pa.types.is_integer(kind) or pa.types.is_floating(kind) for kind in types):
+        return pa.float64()
+    return pa.string()
+
+
+def unique_names(names):
+    """
+    Column names made unique by numbering repeats (name, name_2, ...), as a join may select two columns of one name.
+    """
+    seen = set(names)
+    counts = {}
+    unique = []
+    for name in names:
+        counts[name] = counts.get(name, 0) + 1
+        if counts[name] > 1:
+            number = counts[name]
+            while f"{name}_{number}" in seen:
+                number += 1
+            name = f"{name}_{number}"
+            seen.add(name)
+        unique.append(name)
+    return unique
+
+
+class ResultTable:
+    """
+    Query result held in columnar form (an Arrow table), for paging, sorting, filtering and export on the server.
+
+    The rows are converted once, page by page as they are fetched, so the
+    Python tuples of only one page exist at a time. Sorting and filtering run
+    as Arrow compute kernels over whole columns; the last view is kept, so
+    turning pages re-slices it instead of sorting again. Only the rows of the
+    page on screen are sent to the browser.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._view_key = None
+        self._view = table
+
+    @classmethod
+    def from_query(cls, query):
+        """
+        Run a query yielding pages of rows (such as a GuardedQuery) and collect its result.
+        """
+        chunks = None
+        for page in query:
+            # The columns are known once the query has started
+            if chunks is None:
+                chunks = [[] for _ in query.columns]
+            for arrays, values in zip(chunks, zip(*page)):
+                arrays.append(column_array(list(values)))
+        columns = []
+        for arrays in chunks or [[] for _ in query.columns]:
+            kind = common_type(array.type for array in arrays)
+            columns.append(pa.chunked_array([array.cast(kind) for array in arrays], kind).combine_chunks())
+        return cls(pa.Table.from_arrays(columns, names=unique_names(list(query.columns))))
+
+    @property
+    def columns(self):
+        return self.table.column_names
+
+    @property
+    def num_rows(self):
+        return self.table.num_rows
+
+    def view(self, sort_by=None, descending=False, filter_column=None, contains=""):
+        """
+        Rows whose `filter_column` contains `contains` (case-insensitive), sorted by `sort_by`.
+        """
+        key = (sort_by, descending, filter_column, contains)
+        if key == self._view_key:
+            return self._view
+        view = self.table
+        if filter_column and contains:
+            text = view[filter_column]
+            # BLOBs need not be valid UTF-8, so their raw bytes are searched instead of a text cast
+            if not (pa.types.is_binary(text.type) or pa.types.is_large_binary(text.type)):
+                text = pc.cast(text, pa.string())
+            view = view.filter(pc.fill_null(pc.match_substring(text, contains, ignore_case=True), False))
+        if sort_by:
+            order = "descending" if descending else "ascending"
+            view = view.take(pc.sort_indices(view, sort_keys=[(sort_by, order)], null_placement="at_end"))
+        self._view_key, self._view = key, view
+        return view
+
+    def export(self, view, file_format):
+        """
+        Return a view as CSV or Parquet bytes.
+
+        The file is written a batch at a time to a temporary file and read back
+        once, so the only full-size copy is the one returned (Streamlit serves
+        downloads from memory); no intermediate text or DataFrame of the whole
+        result is built.
+        """
+        with tempfile.TemporaryFile() as output:
+            self.write(view, file_format, output)
+            output.seek(0)
+            return output.read()
+
+    @staticmethod
+    def write(view, file_format, output):
+        """
+        Write a view to a binary file as CSV or Parquet, EXPORT_BATCH_ROWS rows at a time.
+        """
+        if file_format == "csv":
+            with pa_csv.CSVWriter(output, view.schema) as writer:
+                for batch in view.to_batches(max_chunksize=EXPORT_BATCH_ROWS):
+                    writer.write_batch(batch)
+        elif file_format == "parquet":
+            with pq.ParquetWriter(output, view.schema) as writer:
+                for batch in view.to_batches(max_chunksize=EXPORT_BATCH_ROWS):
+                    writer.write_batch(batch)
+        else:
+            raise ValueError(f"Unknown export format '{file_format}'")
@@ -0,0 +1,172 @@
+import math
+import os
+import re
+import sqlite3
+from collections import Counter, namedtuple
+
+from common.lexical_index import tokenize
+
+# SQLite's own tables, which the prompt never describes
+INTERNAL_TABLE = re.compile(r"^sqlite_")
+
+# How much a match on each part of a table's description counts towards its relevance
+FIELD_WEIGHTS = {"table": 3.0, "column": 1.0, "note": 0.5}
+
+Table = namedtuple("Table", "name kind columns references note")
+
+
+def split_identifier(name):
+    """
+    Words of a table or column name: snake_case, camelCase and digits are split ("orderLineItems_2" -> order line items 2).
+    """
+    return re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", name).replace("_", " ")
+
+
+def stem(term):
+    """
+    Crude plural folding so "colleges", "fees" and "categories" match "college", "fee" and "category".
+    """
+    if len(term) > 4 and term.endswith("ies"):
+        return term[:-3] + "y"
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def terms(text):
+    return [stem(term) for term in tokenize(text)]
+
+
+def read_tables(conn, notes=None):
+    """
+    Describe every user table, view and virtual table from sqlite_master, PRAGMA table_info and PRAGMA foreign_key_list.
+    """
+    notes = notes or {}
+    try:
+        # PRAGMA table_list (SQLite >= 3.37) tells the shadow tables of FTS indexes apart
+        shadow = {name for _, name, kind, *_ in conn.execute("PRAGMA table_list") if kind == "shadow"}
+    except sqlite3.Error:
+        shadow = set()
+    tables = []
+    for name, kind, sql in conn.execute(
+        "SELECT name, type, COALESCE(sql, '') FROM sqlite_master WHERE type IN ('table', 'view') ORDER BY name"
+    ):
+        if INTERNAL_TABLE.match(name) or name in shadow:
+            continue
+        virtual = re.search(r"\bUSING\s+(\w+)", sql, re.IGNORECASE) if sql.upper().startswith("CREATE VIRTUAL") else None
+        columns = [
+            (column, declared or "", bool(notnull), bool(pk))
+            for _, column, declared, notnull, _, pk in conn.execute(f'PRAGMA table_info("{name}")')
+        ]
+        references = [
+            (column, parent, parent_column)
+            for _, _, parent, column, parent_column, *_ in conn.execute(f'PRAGMA foreign_key_list("{name}")')
+        ]
+        tables.append(Table(name, virtual.group(1).lower() if virtual else kind, columns, references, notes.get(name, "")))
+    return tables
+
+
+class SchemaPrompt:
+    """
+    Schema description for NL-to-SQL prompts that only includes the tables relevant to a question.
+
+    Tables are read once from the database. Each question is matched against
+    the words of table names, column names and any `notes` (weighted by how
+    few tables share a word), and the `max_tables` best tables are described,
+    each followed by the tables its foreign keys point to so joins can be
+    written. Databases with no more than `max_tables` tables are always
+    described in full, and so is every table when nothing in the question
+    matches.
+    """
+
+    def __init__(self, tables, max_tables=8):
+        self.tables = tables
+        self.max_tables = max_tables
+        self.by_name = {table.name.lower(): table for table in tables}
+        self.fields = [
+            {
+                "table": set(terms(split_identifier(table.name))),
+                "column": {term for column in table.columns for term in terms(split_identifier(column[0]))},
+                "note": set(terms(table.note)),
+            }
+            for table in tables
+        ]
+        document_frequency = Counter(term for fields in self.fields for term in set().union(*fields.values()))
+        self.idf = {term: math.log(1 + len(tables) / count) for term, count in document_frequency.items()}
+
+    @classmethod
+    def from_connection(cls, conn, notes=None, **kwargs):
+        """
+        Build a SchemaPrompt for a database, with `max_tables` from SQL_PROMPT_MAX_TABLES unless given.
+        """
+        settings = {"max_tables": int(os.getenv("SQL_PROMPT_MAX_TABLES", 8))}
+        settings.update(kwargs)
+        return cls(read_tables(conn, notes), **settings)
+
+    def scores(self, question):
+        """
+        Relevance of every table to a question, in table order.
+        """
+        question_terms = set(terms(split_identifier(question)))
+        return [
+            sum(
+                self.idf[term] * max(FIELD_WEIGHTS[field] for field, words in fields.items() if term in words)
+                for term in question_terms & set().union(*fields.values())
+            )
+            for fields in self.fields
+        ]
+
+    def select(self, question):
+        """
+        Return the tables to describe for a question, most relevant first.
+        """
+        if not self.max_tables or len(self.tables) <= self.max_tables:
+            return list(self.tables)
+        scores = self.scores(question)
+        ranked = sorted((-score, position) for position, score in enumerate(scores) if score > 0)
+        if not ranked:
+            return list(self.tables)
+        selected = []
+        for _, position in ranked:
+            if len(selected) >= self.max_tables:
+                break
+            table = self.tables[position]
+            if table in selected:
+                continue
+            selected.append(table)
+            for _, parent, _ in table.references:
+                parent = self.by_name.get(parent.lower())
+                if parent is not None and parent not in selected and len(selected) < self.max_tables:
+                    selected.append(parent)
+        return selected
+
+    def render(self, tables):
+        """
+        Describe tables the way the prompt lists them: columns with their types, foreign keys, then the note.
+        """
+        lines = []
+        for table in tables:
+            if table.kind in ("fts3", "fts4", "fts5"):
+                kind = f"A full-text index ({table.kind.upper()}, query it with MATCH)"
+            elif table.kind == "view":
+                kind = "A view"
+            elif table.kind == "table":
+                kind = "A table"
+            else:
+                kind = f"A virtual table ({table.kind})"
+            columns = ", ".join(
+                f"{name} ({', '.join(filter(None, (declared, 'primary key' if pk else '')))})" if declared or pk else name
+                for name, declared, _, pk in table.columns
+            )
+            lines.append(f"- {kind} named '{table.name}' with columns: {columns}.")
+            for column, parent, parent_column in table.references:
+                lines.append(f"  {table.name}.{column} references {parent}.{parent_column or 'rowid'}.")
+            if table.note:
+                lines.append(f"  {table.note}")
+        return "\n".join(lines)
+
+    def describe(self, question):
+        """
+        Schema section of the prompt for a question.
+        """
+        return self.render(self.select(question))
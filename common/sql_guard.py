@@ -0,0 +1,170 @@
+import os
+import re
+import sqlite3
+import time
+
+# Plan lines for a full table scan: "SCAN COLLEGES" (SQLite >= 3.36) or "SCAN TABLE COLLEGES"
+SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(\S+)(.*)$")
+
+# Words that can follow a table name in a FROM clause without being its alias
+CLAUSE_WORDS = frozenset(
+    "as cross except group having indexed inner intersect join left limit natural not on order outer right union "
+    "using where window".split()
+)
+
+# SQLite virtual machine instructions between time budget checks
+PROGRESS_STEPS = 10000
+
+
+class QueryRejected(Exception):
+    """
+    Raised when a query breaks the QueryPolicy, before it runs or when it runs out of time.
+    """
+
+
+class QueryPolicy:
+    """
+    Limits for running SQL the app did not write.
+
+    A query whose plan scans a table of more than `max_scan_rows` rows without
+    an index is rejected before it runs. Running queries are interrupted after
+    `time_budget` seconds, and at most `max_rows` rows are read, `page_size` at
+    a time.
+    """
+
+    def __init__(self, max_scan_rows=1000000, time_budget=5.0, max_rows=1000000, page_size=5000):
+        self.max_scan_rows = max_scan_rows
+        self.time_budget = time_budget
+        self.max_rows = max_rows
+        self.page_size = page_size
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """
+        Build a QueryPolicy configured from SQL_GUARD_* environment variables.
+        """
+        settings = {
+            "max_scan_rows": int(os.getenv("SQL_GUARD_MAX_SCAN_ROWS", 1000000)),
+            "time_budget": float(os.getenv("SQL_GUARD_TIME_BUDGET_SECONDS", 5)),
+            "max_rows": int(os.getenv("SQL_GUARD_MAX_ROWS", 1000000)),
+            "page_size": int(os.getenv("SQL_GUARD_PAGE_SIZE", 5000)),
+        }
+        settings.update(kwargs)
+        return cls(**settings)
+
+
+def table_rows(conn, table):
+    """
+    Cheap upper bound of a table's row count: its largest rowid, or the ANALYZE statistics; None if unknown.
+    """
+    try:
+        return conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+    except sqlite3.Error:
+        pass
+    try:
+        row = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NULL", (table,)).fetchone()
+    except sqlite3.Error:
+        return None
+    return int(row[0].split()[0]) if row else None
+
+
+def table_aliases(sql, tables):
+    """
+    Map lower-cased table names and their aliases in a query (`FROM colleges c`, `JOIN colleges AS d`) to table names.
+    """
+    aliases = {name.lower(): name for name in tables}
+    words = re.findall(r"\w+", sql)
+    for i, word in enumerate(words[:-1]):
+        table = aliases.get(word.lower())
+        if table is None or table != aliases.get(table.lower()):
+            continue
+        alias = words[i + 2] if words[i + 1].lower() == "as" and i + 2 < len(words) else words[i + 1]
+        if alias.lower() not in CLAUSE_WORDS:
+            aliases.setdefault(alias.lower(), table)
+    return aliases
+
+
+def full_scans(conn, sql):
+    """
+    Return (table, estimated rows) for every table the query plan scans without an index.
+    """
+    tables = [name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    aliases = table_aliases(sql, tables)
+    scans = []
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        match = SCAN_PATTERN.match(row[-1])
+        # Plans name a table by its alias when it has one
+        table = aliases.get(match.group(1).lower()) if match is not None else None
+        if table is None or "INDEX" in match.group(2):
+            continue
+        scans.append((table, table_rows(conn, table)))
+    return scans
+
+
+def check_plan(conn, sql, policy):
+    """
+    Raise QueryRejected if the query would scan a table larger than the policy allows without an index.
+    """
+    if policy.max_scan_rows is None:
+        return
+    for table, rows in full_scans(conn, sql):
+        if rows is not None and rows > policy.max_scan_rows:
+            raise QueryRejected(
+                f"the query scans all of {table} (about {rows:,} rows) without an index; "
+                f"ask for something narrower or add an index"
+            )
+
+
+class GuardedQuery:
+    """
+    Run a query on a pooled connection under a QueryPolicy, yielding its rows page by page.
+
+    Iterating checks the plan, then fetches `page_size` rows at a time with
+    `fetchmany`, so at most one page is held in memory, and stops at
+    `max_rows`; SQLite stops computing once the cursor is no longer stepped. A
+    progress handler interrupts the query once it has spent `time_budget`
+    inside SQLite; the time the consumer takes between pages does not count.
+    `columns`, `row_count` and `truncated` are set as pages are read.
+    """
+
+    def __init__(self, pool, sql, policy):
+        self.pool = pool
+        self.sql = sql
+        self.policy = policy
+        self.columns = []
+        self.row_count = 0
+        self.truncated = False
+
+    def __iter__(self):
+        with self.pool.connection() as conn:
+            check_plan(conn, self.sql, self.policy)
+            budget = self.policy.time_budget
+            # Seconds spent in SQLite on earlier pages, and when the current step into SQLite started
+            spent, started = 0.0, time.monotonic()
+            if budget:
+                conn.set_progress_handler(lambda: spent + time.monotonic() - started > budget, PROGRESS_STEPS)
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self.sql)
+                self.columns = [column[0] for column in cursor.description or ()]
+                while True:
+                    size = self.policy.page_size
+                    if self.policy.max_rows:
+                        size = min(size, self.policy.max_rows - self.row_count)
+                        if size <= 0:
+                            self.truncated = cursor.fetchone() is not None
+                            break
+                    page = cursor.fetchmany(size)
+                    if not page:
+                        break
+                    self.row_count += len(page)
+                    spent += time.monotonic() - started
+                    yield page
+                    started = time.monotonic()
+            except sqlite3.OperationalError as e:
+                if budget and spent + time.monotonic() - started > budget:
+                    raise QueryRejected(f"the query ran out of its {self.policy.time_budget:g}s time budget") from e
+                raise
+            finally:
+                cursor.close()
+                conn.set_progress_handler(None, 0)
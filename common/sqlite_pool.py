@@ -0,0 +1,122 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class SQLitePool:
+    """
+    Pool of read-only connections to one SQLite database, shared by every thread in the process.
+
+    Connections are opened lazily, up to `size`, in URI read-only mode with
+    `query_only` set, so nothing issued through the pool can modify the file.
+    Each keeps `statement_cache` prepared statements, a page cache of
+    `cache_mb` and maps up to `mmap_mb` of the file. The journal mode is left
+    as the database has it: switching to WAL is a write that would stick to a
+    file checked into the repository, so while sql.py reloads the data readers
+    wait up to `timeout` for its commits instead. A connection is used by one
+    thread at a time; `connection()` blocks for up to `timeout` seconds when
+    all are busy.
+    """
+
+    def __init__(self, path, size=4, mmap_mb=256, cache_mb=16, statement_cache=256, timeout=30.0):
+        self.path = os.path.abspath(path)
+        self.size = size
+        self.mmap_mb = mmap_mb
+        self.cache_mb = cache_mb
+        self.statement_cache = statement_cache
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        self.lock = threading.Lock()
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"SQLite database '{path}' does not exist")
+
+    @classmethod
+    def from_env(cls, path, **kwargs):
+        """
+        Build a pool configured from SQLITE_POOL_* environment variables.
+        """
+        settings = {
+            "size": int(os.getenv("SQLITE_POOL_SIZE", 4)),
+            "mmap_mb": int(os.getenv("SQLITE_POOL_MMAP_MB", 256)),
+            "cache_mb": int(os.getenv("SQLITE_POOL_CACHE_MB", 16)),
+            "statement_cache": int(os.getenv("SQLITE_POOL_STATEMENT_CACHE", 256)),
+        }
+        settings.update(kwargs)
+        return cls(path, **settings)
+
+    def _open(self):
+        conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro",
+            uri=True,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.statement_cache,
+        )
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_mb * 1024 * 1024}")
+        conn.execute(f"PRAGMA cache_size={-self.cache_mb * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.opened < self.size:
+                self.opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self.opened -= 1
+                    raise
+        try:
+            return self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No SQLite connection to {self.path} became free within {self.timeout}s") from None
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of the block.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            # End any read transaction left open so it does not hold a shared lock that blocks writers
+            if conn.in_transaction:
+                conn.rollback()
+            self.idle.put(conn)
+
+    def close(self):
+        """
+        Close the idle connections.
+        """
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self.lock:
+                self.opened -= 1
+
+
+def get_pool(path):
+    """
+    Return the process-wide pool for a database file, creating it from SQLITE_POOL_* settings on first use.
+    """
+    key = os.path.abspath(path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SQLitePool.from_env(key)
+        return pool
@@ -0,0 +1,317 @@
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "traces.jsonl")
+
+# Histogram bucket upper bounds, in milliseconds
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_timing = threading.local()
+
+
+def count_tokens(text):
+    """
+    Rough token count of a text (whitespace-separated words), for when the provider reports none.
+    """
+    return len(text.split()) if text else 0
+
+
+def usage_attributes(response):
+    """
+    Return prompt/output token counts from a Gemini response's usage metadata, or {} if it has none.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+    }
+
+
+class Span:
+    """
+    One timed stage. Numeric attributes (bytes, tokens, rows, ...) are summed per
+    stage in the metrics; `mark` records a point inside the span, such as the
+    first streamed token, as its own latency series named `<span>.<event>`.
+    """
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes or {})
+        self.marks = {}
+        self.timestamp = time.time()
+        self.start = time.perf_counter()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, **counts):
+        for key, value in counts.items():
+            self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def mark(self, event):
+        self.marks.setdefault(event, self.elapsed_ms())
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Tracer:
+    """
+    Collects spans into per-stage wall-time histograms and attribute totals.
+
+    Finished spans are appended to a JSONL file (rotated to `.1` past
+    `max_log_bytes`) when `log_path` is set, and the metrics can be rendered in
+    the Prometheus text format or served on a local HTTP endpoint.
+    """
+
+    def __init__(self, log_path=None, max_log_bytes=64 * 1024 * 1024):
+        self.log_path = log_path
+        self.max_log_bytes = max_log_bytes
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.totals = {}
+        self.server = None
+        if log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # A generator holding the span was closed from another context
+                pass
+            self.finish(span)
+
+    def observe(self, name, duration_ms, **attributes):
+        """
+        Record a stage whose time was measured by the caller.
+        """
+        self.finish(Span(name, _current_span.get(), attributes), duration_ms)
+
+    def finish(self, span, duration_ms=None):
+        duration_ms = span.elapsed_ms() if duration_ms is None else duration_ms
+        with self.lock:
+            self._observe(span.name, duration_ms)
+            for event, offset_ms in span.marks.items():
+                self._observe(f"{span.name}.{event}", offset_ms)
+            for key, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.totals[(span.name, key)] = self.totals.get((span.name, key), 0) + value
+            if self.log_path:
+                self._write({
+                    "ts": span.timestamp,
+                    "trace_id": span.trace_id,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "duration_ms": round(duration_ms, 3),
+                    "marks_ms": {event: round(offset, 3) for event, offset in span.marks.items()},
+                    "attributes": span.attributes,
+                })
+
+    def _observe(self, name, duration_ms):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(duration_ms)
+
+    def _write(self, record):
+        try:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self.max_log_bytes:
+                os.replace(self.log_path, self.log_path + ".1")
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            logger.warning("Could not write trace to %s: %s", self.log_path, e)
+
+    def render_prometheus(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP app_span_duration_ms Wall time of each traced stage in milliseconds.",
+            "# TYPE app_span_duration_ms histogram",
+        ]
+        with self.lock:
+            for name, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'app_span_duration_ms_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'app_span_duration_ms_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'app_span_duration_ms_sum{{span="{name}"}} {histogram.sum:.3f}')
+                lines.append(f'app_span_duration_ms_count{{span="{name}"}} {histogram.count}')
+            lines.append("# HELP app_span_attribute_total Sum of numeric span attributes such as bytes and tokens.")
+            lines.append("# TYPE app_span_attribute_total counter")
+            for (name, key), total in sorted(self.totals.items()):
+                lines.append(f'app_span_attribute_total{{span="{name}",attribute="{key}"}} {total}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Serve the metrics at http://host:port/metrics from a daemon thread (once per tracer).
+        """
+        if self.server is not None:
+            return self.server
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = tracer.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True).start()
+        return self.server
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """
+    Return the process-wide tracer configured by TRACE_LOG_PATH, TRACE_LOG_MAX_MB and METRICS_PORT.
+
+    TRACE_LOG_PATH defaults to .cache/traces.jsonl in the repository (set it
+    empty to disable the file); the metrics endpoint is only started when
+    METRICS_PORT is set.
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(
+                os.getenv("TRACE_LOG_PATH", DEFAULT_LOG_PATH) or None,
+                int(float(os.getenv("TRACE_LOG_MAX_MB", 64)) * 1024 * 1024),
+            )
+            port = os.getenv("METRICS_PORT")
+            if port:
+                try:
+                    _tracer.serve(int(port), os.getenv("METRICS_HOST", "127.0.0.1"))
+                except OSError as e:
+                    logger.warning("Metrics endpoint not started on port %s: %s", port, e)
+        return _tracer
+
+
+def current_span():
+    return _current_span.get()
+
+
+def span(name, **attributes):
+    """
+    Time a stage of the current request: `with span("search", k=4) as s: ...`.
+    """
+    return get_tracer().span(name, **attributes)
+
+
+def traced(name, **attributes):
+    """
+    Decorator recording every call of a function as a span.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_iter(name, iterable, **attributes):
+    """
+    Yield from a lazy iterable, recording as one span the time spent producing its items.
+
+    Time the consumer spends between items is not counted, and neither is time
+    spent inside nested `timed_iter`s, so chained stages of a streaming pipeline
+    (extract -> split -> embed) each report their own share of the wall time.
+    """
+    stack = getattr(_timing, "stack", None)
+    if stack is None:
+        stack = _timing.stack = []
+    iterator = iter(iterable)
+    own, items = 0.0, 0
+    try:
+        while True:
+            frame = [0.0]
+            stack.append(frame)
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                own += elapsed - frame[0]
+                if stack:
+                    stack[-1][0] += elapsed
+            items += 1
+            yield item
+    finally:
+        get_tracer().observe(name, own * 1000, items=items, **attributes)
+
+
+def traced_stream(name, stream, text=lambda item: getattr(item, "text", item), **attributes):
+    """
+    Yield from a streamed LLM response, recording a span with the first-token time and output token count.
+
+    Pass a zero-argument callable as `stream` to start the request inside the
+    span, so time to first token includes the call itself.
+    """
+    with span(name, **attributes) as current:
+        for item in stream() if callable(stream) else stream:
+            current.mark("first_token")
+            try:
+                current.add(output_tokens=count_tokens(text(item)))
+            except (TypeError, ValueError, AttributeError):
+                pass
+            yield item
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from common.answer_cache import normalize_question
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "sql_translations.sqlite")
+
+
+def schema_fingerprint(conn, *extra):
+    """
+    Hash the schema recorded in sqlite_master, plus any `extra` strings (such as the prompt) the translation depends on.
+    """
+    digest = hashlib.sha256()
+    for row in conn.execute("SELECT type, name, tbl_name, COALESCE(sql, '') FROM sqlite_master ORDER BY type, name"):
+        digest.update("\x1f".join(row).encode("utf-8") + b"\x1e")
+    for value in extra:
+        digest.update(value.encode("utf-8") + b"\x1e")
+    return digest.hexdigest()
+
+
+class TranslationCache:
+    """
+    SQLite-backed LRU + TTL cache of generated SQL keyed by (schema fingerprint, normalized question).
+
+    The cache file is shared by every session and survives restarts. Entries
+    expire `ttl_seconds` after they were generated; past `max_entries`, the
+    least recently used ones are evicted until the cache is back under 90% of
+    the limit. A schema change gives a new fingerprint, so SQL written for the
+    old schema is never served again and ages out.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=1000, ttl_seconds=86400):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                fingerprint TEXT NOT NULL,
+                question TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (fingerprint, question)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self.conn.commit()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """
+        Build a TranslationCache configured from SQL_CACHE_* environment variables.
+        """
+        settings = {
+            "path": os.getenv("SQL_CACHE_PATH") or DEFAULT_CACHE_PATH,
+            "max_entries": int(os.getenv("SQL_CACHE_MAX_ENTRIES", 1000)),
+            "ttl_seconds": float(os.getenv("SQL_CACHE_TTL_SECONDS", 86400)),
+        }
+        settings.update(kwargs)
+        return cls(**settings)
+
+    def get(self, fingerprint, question):
+        """
+        Return the cached SQL for a question under a schema fingerprint, or None.
+        """
+        key = normalize_question(question)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT sql, created_at FROM translations WHERE fingerprint = ? AND question = ?", (fingerprint, key)
+            ).fetchone()
+            if row is not None and row[1] + self.ttl_seconds > now:
+                self.conn.execute(
+                    "UPDATE translations SET last_used = ? WHERE fingerprint = ? AND question = ?", (now, fingerprint, key)
+                )
+                self.conn.commit()
+                self.hits += 1
+                return row[0]
+            if row is not None:
+                self.conn.execute("DELETE FROM translations WHERE fingerprint = ? AND question = ?", (fingerprint, key))
+                self.conn.commit()
+                self.expirations += 1
+            self.misses += 1
+        return None
+
+    def put(self, fingerprint, question, sql):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO translations (fingerprint, question, sql, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (fingerprint, normalize_question(question), sql, now, now),
+            )
+            count = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - int(self.max_entries * 0.9)
+                self.conn.execute(
+                    "DELETE FROM translations WHERE (fingerprint, question) IN "
+                    "(SELECT fingerprint, question FROM translations ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0],
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
@@ -3,8 +3,12 @@ load_dotenv() ## loading all the environment variables
 
 import streamlit as st
 import os
+import sys
 import google.generativeai as genai
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.tracing import traced_stream
+
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
 ## function to load Gemini Pro model and get repsonses
@@ -12,7 +16,7 @@ model=genai.GenerativeModel("gemini-pro")
 chat = model.start_chat(history=[])
 def get_gemini_response(question):
     
-    response=chat.send_message(question,stream=True)
+    response=traced_stream("llm",lambda: chat.send_message(question,stream=True)) ## llm span with time to first token
     return response
 
 ##initialize our streamlit app
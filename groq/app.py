@@ -1,15 +1,18 @@
 import streamlit as st
 import os
 from langchain_groq import ChatGroq
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.prompts import ChatPromptTemplate
-from langchain.chains import create_retrieval_chain
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import PyPDFDirectoryLoader
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.embedding_cache import CachedEmbeddings, get_default_cache
+from common.embedding_engine import BatchEmbeddings
+from common.answer_cache import AnswerCache
+from common.langchain_tracing import SpanCallbackHandler
+from common.tracing import span, traced
+from index_registry import IndexRegistry
+from chains import build_retrieval_chain
 load_dotenv()
 
 ## load the GROQ And OpenAI API KEY 
@@ -18,10 +21,9 @@ os.environ["GOOGLE_API_KEY"]=os.getenv("GOOGLE_API_KEY")
 
 st.title("Gemma Model Document Q&A")
 
-llm=ChatGroq(groq_api_key=groq_api_key,
-             model_name="Llama3-8b-8192")
+model_name="Llama3-8b-8192"
 
-prompt=ChatPromptTemplate.from_template(
+template=(
 """
 Answer the questions based on the provided context only.
 Please provide the most accurate response based on the question
@@ -33,16 +35,35 @@ Questions:{input}
 """
 )
 
-def vector_embedding():
+@st.cache_resource
+def get_llm(model_name):
+    return ChatGroq(groq_api_key=groq_api_key,
+                    model_name=model_name)
+
+@st.cache_resource(max_entries=4)
+def get_retrieval_chain(index_version,model_name,template,_vectors):
+    return build_retrieval_chain(get_llm(model_name),template,_vectors) ## built once per index version, not per rerun
+
+@st.cache_resource
+def get_answer_cache():
+    return AnswerCache.from_env() ## shared by all sessions
 
-    if "vectors" not in st.session_state:
+def get_embeddings():
+    batched=BatchEmbeddings.from_env(GoogleGenerativeAIEmbeddings(model = "models/embedding-001"))
+    return CachedEmbeddings(batched,get_default_cache(),"models/embedding-001") ## skips chunks embedded before
+
+@st.cache_resource
+def get_index_registry():
+    registry=IndexRegistry("./education","./faiss_index",get_embeddings()) ## one read-only index for all sessions, saved to disk
+    registry.watch() ## picks up added, changed and removed PDFs without a restart
+    return registry
+
+@traced("ingest")
+def vector_embedding():
 
-        st.session_state.embeddings=GoogleGenerativeAIEmbeddings(model = "models/embedding-001")
-        st.session_state.loader=PyPDFDirectoryLoader("./education") ## Data Ingestion
-        st.session_state.docs=st.session_state.loader.load() ## Document Loading
-        st.session_state.text_splitter=RecursiveCharacterTextSplitter(chunk_size=1000,chunk_overlap=200) ## Chunk Creation
-        st.session_state.final_documents=st.session_state.text_splitter.split_documents(st.session_state.docs[:20]) #splitting
-        st.session_state.vectors=FAISS.from_documents(st.session_state.final_documents,st.session_state.embeddings) #vector OpenAI embeddings
+    progress_bar=st.progress(0.0,text="Indexing documents...")
+    stats=get_index_registry().refresh(progress=lambda done,total: progress_bar.progress(done/total,text=f"Indexed {done}/{total} changed files"))
+    progress_bar.progress(1.0,text=f"{stats['files']} files indexed, {stats['added_chunks']} chunks added, {stats['deleted_chunks']} removed")
 
 
 
@@ -55,18 +76,21 @@ if st.button("Documents Embedding"):
     vector_embedding()
     st.write("Vector Store DB Is Ready")
 
-import time
-
-
-
-if prompt1:
-    document_chain=create_stuff_documents_chain(llm,prompt)
-    retriever=st.session_state.vectors.as_retriever()
-    retrieval_chain=create_retrieval_chain(retriever,document_chain)
-    start=time.process_time()
-    response=retrieval_chain.invoke({'input':prompt1})
-    print("Response time :",time.process_time()-start)
-    st.write(response['answer'])
+index_version,vectors=get_index_registry().peek()
+
+if prompt1 and vectors is None:
+    st.write("Click Documents Embedding to build the Vector Store DB first")
+elif prompt1:
+    with span("question",chars=len(prompt1)) as question_span: ## search, prompt and llm stages are recorded inside it
+        answer_cache=get_answer_cache()
+        answer,question_embedding=answer_cache.lookup(index_version,prompt1,embed=vectors.embeddings.embed_query)
+        question_span.set(cached=answer is not None)
+        if answer is None:
+            retrieval_chain=get_retrieval_chain(index_version,model_name,template,vectors)
+            response=retrieval_chain.invoke({'input':prompt1},config={"callbacks":[SpanCallbackHandler()]})
+            answer=response['answer']
+            answer_cache.put(index_version,prompt1,answer,question_embedding)
+    st.write(answer)
 
     # # With a streamlit expander
     # with st.expander("Document Similarity Search"):
@@ -75,6 +99,5 @@ if prompt1:
     #         st.write(doc.page_content)
     #         st.write("--------------------------------")
 
-
-
-
+cache_stats=get_answer_cache().stats()
+st.sidebar.caption(f"Answer cache: {cache_stats['exact_hits']+cache_stats['semantic_hits']} hits ({cache_stats['semantic_hits']} semantic), {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['entries']} entries.")
@@ -1,16 +1,20 @@
 import streamlit as st
 import os
 from langchain_groq import ChatGroq
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.prompts import ChatPromptTemplate
-from langchain.chains import create_retrieval_chain
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import PyPDFDirectoryLoader
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
 import os
-import time
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.embedding_cache import CachedEmbeddings, get_default_cache
+from common.embedding_engine import BatchEmbeddings
+from common.answer_cache import AnswerCache
+from common.langchain_tracing import SpanCallbackHandler
+from common.tracing import span, traced
+from index_registry import IndexRegistry
+from chains import build_retrieval_chain
+from chat_history import ChatHistory
 
 # Load the environment variables
 load_dotenv()
@@ -19,17 +23,17 @@ load_dotenv()
 groq_api_key = os.getenv('GROQ_API_KEY')
 os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
 
-# Initialize the model
-llm = ChatGroq(groq_api_key=groq_api_key, model_name="Llama3-8b-8192")
+# Model used for answers
+model_name = "Llama3-8b-8192"
 
 st.title("Career Guidance Chatbot")
 
-# Chat history
+# Chat history, rendered as the newest turns plus one block for older ones
 if 'history' not in st.session_state:
-    st.session_state.history = []
+    st.session_state.history = ChatHistory()
 
 # Define prompt template
-prompt = ChatPromptTemplate.from_template(
+template = (
     """
     You are a career guidance counselor.
     Help the student choose their next educational step based on their interests and academic performance.
@@ -45,25 +49,54 @@ prompt = ChatPromptTemplate.from_template(
 
 # Function to store chat history
 def store_chat(user_input, bot_response):
-    st.session_state.history.append({"user": user_input, "bot": bot_response})
+    st.session_state.history.append(user_input, bot_response)
+
+# Initialize the model once per process
+@st.cache_resource
+def get_llm(model_name):
+    return ChatGroq(groq_api_key=groq_api_key, model_name=model_name)
+
+# Chain, retriever and prompt are reused until the index version changes
+@st.cache_resource(max_entries=4)
+def get_retrieval_chain(index_version, model_name, template, _vectors):
+    return build_retrieval_chain(get_llm(model_name), template, _vectors)
+
+# Answer cache shared by all sessions
+@st.cache_resource
+def get_answer_cache():
+    return AnswerCache.from_env()
+
+# Function to create embeddings
+def get_embeddings():
+    batched = BatchEmbeddings.from_env(GoogleGenerativeAIEmbeddings(model="models/embedding-001"))
+    # Chunks embedded by an earlier session or app are served from the shared cache
+    return CachedEmbeddings(batched, get_default_cache(), "models/embedding-001")
+
+# Vector index shared read-only by all sessions and saved to disk
+# A background watcher applies added, changed and removed PDFs without a restart
+@st.cache_resource
+def get_index_registry():
+    registry = IndexRegistry("./education", "./faiss_index", get_embeddings())
+    registry.watch()
+    return registry
 
 # Function to load embeddings
+@traced("ingest")
 def vector_embedding():
-    if "vectors" not in st.session_state:
-        st.session_state.embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-        st.session_state.loader = PyPDFDirectoryLoader("./education")  # Data ingestion
-        st.session_state.docs = st.session_state.loader.load()  # Document loading
-        st.session_state.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)  # Chunking
-        st.session_state.final_documents = st.session_state.text_splitter.split_documents(st.session_state.docs[:20])
-        st.session_state.vectors = FAISS.from_documents(st.session_state.final_documents, st.session_state.embeddings)
+    registry = get_index_registry()
+    index_version, vectors = registry.peek()  # Loads the saved index if there is one
+    if vectors is None:
+        progress_bar = st.progress(0.0, text="Indexing documents...")
+        index_version, vectors = registry.get(
+            progress=lambda done, total: progress_bar.progress(done / total, text=f"Indexed {done}/{total} files"),
+        )
+    return index_version, vectors
 
 # Get user input
 user_input = st.text_input("Ask your career-related question:")
 
 # Display chat history
-for chat in st.session_state.history:
-    st.write(f"You: {chat['user']}")
-    st.write(f"Bot: {chat['bot']}")
+st.session_state.history.render()
 
 # Button to process embeddings
 if st.button("Documents Embedding"):
@@ -72,17 +105,24 @@ if st.button("Documents Embedding"):
 
 # Process user input
 if user_input:
-    vector_embedding()  # Ensure vector embeddings are loaded
-    document_chain = create_stuff_documents_chain(llm, prompt)
-    retriever = st.session_state.vectors.as_retriever()
-    retrieval_chain = create_retrieval_chain(retriever, document_chain)
+    index_version, vectors = vector_embedding()  # Built once per corpus version, then shared
+
+    # Search, prompt and LLM stages are recorded as spans inside the question span
+    with span("question", chars=len(user_input)) as question_span:
+        # Reuse the answer to a repeated (or similar) question
+        answer_cache = get_answer_cache()
+        bot_response, question_embedding = answer_cache.lookup(
+            index_version, user_input, embed=vectors.embeddings.embed_query
+        )
+        question_span.set(cached=bot_response is not None)
+        if bot_response is None:
+            retrieval_chain = get_retrieval_chain(index_version, model_name, template, vectors)
 
-    # Retrieve response
-    start = time.process_time()
-    response = retrieval_chain.invoke({'input': user_input})
-    end_time = time.process_time() - start
+            # Retrieve response
+            response = retrieval_chain.invoke({'input': user_input}, config={"callbacks": [SpanCallbackHandler()]})
 
-    bot_response = response['answer']
+            bot_response = response['answer']
+            answer_cache.put(index_version, user_input, bot_response, question_embedding)
     st.write(f"Bot: {bot_response}")
     store_chat(user_input, bot_response)
 
@@ -91,3 +131,11 @@ if user_input:
     #     for doc in response.get("context", []):
     #         st.write(doc.page_content)
     #         st.write("--------------------------------")
+
+# Answer cache effectiveness, shared by all sessions
+cache_stats = get_answer_cache().stats()
+st.sidebar.caption(
+    f"Answer cache: {cache_stats['exact_hits'] + cache_stats['semantic_hits']} hits "
+    f"({cache_stats['semantic_hits']} semantic), {cache_stats['misses']} misses "
+    f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['entries']} entries."
+)
@@ -0,0 +1,218 @@
+"""
+Answer a file of questions with the groq retrieval chain, concurrently and without Streamlit.
+
+    python batch_qa.py questions.jsonl --output answers.jsonl --concurrency 8 --rate 5
+
+Questions are read from JSONL (objects with "question" and optional "id", or
+plain strings) or CSV (a "question" column, optional "id"); the id defaults to
+the line or row number. Up to `--concurrency` questions are in flight at once,
+LLM requests are started at no more than `--rate` per second, and each answer is
+appended to the output as one JSON line as soon as it completes. Questions that
+already have an answer in the output are skipped, so rerunning the same command
+resumes an interrupted run and retries the questions that failed.
+
+`--stub` answers with a local stub LLM and offline embeddings, for measuring
+the throughput of the pipeline without API keys or cost.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from common import chunk_store, index_factory
+from common.embedding_cache import CachedEmbeddings, get_default_cache
+from common.embedding_engine import BatchEmbeddings, FakeEmbeddings, RateLimiter
+from common.langchain_tracing import SpanCallbackHandler
+from common.tracing import span
+from chains import build_retrieval_chain
+from index_registry import IndexRegistry
+
+CORPUS_DIR = "./education"
+INDEX_DIR = "./faiss_index"
+EMBEDDING_MODEL = "models/embedding-001"
+MODEL_NAME = "Llama3-8b-8192"
+
+TEMPLATE = """
+Answer the questions based on the provided context only.
+Please provide the most accurate response based on the question
+<context>
+{context}
+<context>
+Questions:{input}
+
+"""
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Local chat model that answers after a fixed delay, for throughput tests of the batch pipeline.
+    """
+
+    latency: float = 0.5
+
+    @property
+    def _llm_type(self):
+        return "stub"
+
+    def _answer(self, messages):
+        words = str(messages[-1].content).split()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words[-20:])))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._answer(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._answer(messages)
+
+
+def iter_questions(path):
+    """
+    Yield (id, question) from a JSONL or CSV file.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row_no, row in enumerate(csv.DictReader(f), 1):
+                if row.get("question"):
+                    yield str(row.get("id") or row_no), row["question"]
+            return
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"question": record}
+            if record.get("question"):
+                yield str(record.get("id", line_no)), record["question"]
+
+
+def load_checkpoint(path):
+    """
+    Return the ids already answered in an output file, first cutting off a line left half-written by a crash.
+    """
+    answered = set()
+    if not os.path.exists(path):
+        return answered
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if "answer" in record:
+            answered.add(str(record["id"]))
+    return answered
+
+
+async def answer_all(chain, questions, output, concurrency, rate_limiter=None):
+    """
+    Answer (id, question) pairs with `concurrency` workers, writing each result to `output` as it completes.
+    """
+    stats = {"answered": 0, "failed": 0}
+
+    async def worker():
+        # Workers share one iterator, so questions are read from the file only as they are taken
+        for id_, question in questions:
+            while rate_limiter is not None:
+                wait_time = rate_limiter.reserve()
+                if not wait_time:
+                    break
+                await asyncio.sleep(wait_time)
+            record = {"id": id_, "question": question}
+            start = time.perf_counter()
+            try:
+                with span("question", chars=len(question)):
+                    response = await chain.ainvoke({"input": question}, config={"callbacks": [SpanCallbackHandler()]})
+                record["answer"] = response["answer"]
+                record["sources"] = [document.metadata for document in response.get("context", [])]
+                stats["answered"] += 1
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+                stats["failed"] += 1
+            record["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats
+
+
+def get_embeddings(stub):
+    if stub:
+        # Offline vectors of the saved index's dimension, so searches still run against it
+        index_path = os.path.join(INDEX_DIR, chunk_store.INDEX_FILE)
+        size = index_factory.read_index(index_path).d if os.path.exists(index_path) else 768
+        return FakeEmbeddings(size=size)
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    batched = BatchEmbeddings.from_env(GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL))
+    return CachedEmbeddings(batched, get_default_cache(), EMBEDDING_MODEL)
+
+
+def get_llm(args):
+    if args.stub:
+        return StubChatModel(latency=args.stub_latency)
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(groq_api_key=os.getenv("GROQ_API_KEY"), model_name=args.model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("questions", help="JSONL or CSV file of questions")
+    parser.add_argument("--output", "-o", default="answers.jsonl", help="JSONL file answers are appended to")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_QA_CONCURRENCY", 8)))
+    parser.add_argument("--rate", type=float, default=float(os.getenv("BATCH_QA_REQUESTS_PER_SECOND", 0)),
+                        help="maximum questions started per second (0 for no limit)")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--template", help="file with a prompt template using {context} and {input}")
+    parser.add_argument("--stub", action="store_true", help="use a local stub LLM and offline embeddings")
+    parser.add_argument("--stub-latency", type=float, default=0.5, help="seconds the stub LLM takes per answer")
+    args = parser.parse_args()
+
+    load_dotenv()
+    template = TEMPLATE
+    if args.template:
+        with open(args.template, "r", encoding="utf-8") as f:
+            template = f.read()
+
+    registry = IndexRegistry(CORPUS_DIR, INDEX_DIR, get_embeddings(args.stub))
+    # The stub's offline vectors must never be saved into the index the apps serve
+    _, vectors = registry.peek() if args.stub else registry.get()
+    if vectors is None:
+        parser.error(f"no index in {INDEX_DIR}; build it once without --stub (or with the apps) first")
+    chain = build_retrieval_chain(get_llm(args), template, vectors)
+
+    answered = load_checkpoint(args.output)
+    questions = ((id_, question) for id_, question in iter_questions(args.questions) if id_ not in answered)
+    rate_limiter = RateLimiter(args.rate) if args.rate else None
+
+    start = time.perf_counter()
+    with open(args.output, "a", encoding="utf-8") as output:
+        stats = asyncio.run(answer_all(chain, questions, output, max(1, args.concurrency), rate_limiter))
+    seconds = time.perf_counter() - start
+    print(json.dumps({
+        **stats,
+        "skipped": len(answered),
+        "seconds": round(seconds, 3),
+        "questions_per_second": round((stats["answered"] + stats["failed"]) / seconds, 3) if seconds else None,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+from langchain.chains import create_retrieval_chain
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain_core.prompts import ChatPromptTemplate
+
+
+def build_retrieval_chain(llm, template, vectors):
+    """
+    Build the retrieval chain the groq apps answer with: `vectors` retriever -> `template` prompt stuffed with the hits -> `llm`.
+
+    The apps cache the result per (index version, model, template), so this runs
+    once per index update instead of on every rerun.
+    """
+    document_chain = create_stuff_documents_chain(llm, ChatPromptTemplate.from_template(template))
+    return create_retrieval_chain(vectors.as_retriever(), document_chain)
@@ -0,0 +1,43 @@
+from collections import deque
+
+import streamlit as st
+
+
+class ChatHistory:
+    """
+    Compact per-session chat log of (question, answer) tuples.
+
+    Only the newest `recent` turns are rendered as separate elements. Older turns
+    are folded, as they age out, into one markdown block inside an expander, so a
+    rerun renders the same few elements however long the conversation gets. At
+    most `max_turns` folded turns are kept.
+    """
+
+    def __init__(self, recent=5, max_turns=500):
+        self.turns = deque(maxlen=recent)
+        self.archive = deque(maxlen=max_turns)
+        self.archived = 0
+
+    def __len__(self):
+        return self.archived + len(self.turns)
+
+    def append(self, question, answer):
+        """
+        Add a turn unless it repeats the last one (a rerun with the same question); returns whether it was added.
+        """
+        if self.turns and self.turns[-1] == (question, answer):
+            return False
+        if len(self.turns) == self.turns.maxlen:
+            old_question, old_answer = self.turns[0]
+            self.archive.append(f"**You:** {old_question}  \n**Bot:** {old_answer}")
+            self.archived += 1
+        self.turns.append((question, answer))
+        return True
+
+    def render(self):
+        if self.archive:
+            with st.expander(f"Earlier conversation ({self.archived} turns)"):
+                st.markdown("\n\n".join(self.archive))
+        for question, answer in self.turns:
+            st.write(f"You: {question}")
+            st.write(f"Bot: {answer}")
@@ -0,0 +1,16 @@
+import hashlib
+import os
+
+
+def corpus_version(folder):
+    """
+    Return a short fingerprint of the PDFs in a folder from their names, sizes and modification times.
+    """
+    digest = hashlib.sha256()
+    for root, _, files in sorted(os.walk(folder)):
+        for name in sorted(files):
+            if not name.lower().endswith(".pdf"):
+                continue
+            stat = os.stat(os.path.join(root, name))
+            digest.update(f"{os.path.relpath(os.path.join(root, name), folder)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
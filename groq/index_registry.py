@@ -0,0 +1,102 @@
+import logging
+import os
+import threading
+import time
+
+from common import chunk_store, index_factory, lexical_index
+from common.hybrid_search import HybridSearch
+from common.manifest import IndexManifest
+from ingest import scan_corpus, sync_index
+
+logger = logging.getLogger(__name__)
+
+
+def watch_interval_from_env():
+    """
+    Return the seconds between corpus scans from INGEST_WATCH_SECONDS (0 disables the watcher).
+    """
+    return float(os.getenv("INGEST_WATCH_SECONDS", "30"))
+
+
+class IndexRegistry:
+    """
+    Process-wide vector store for a corpus folder, shared read-only by every session.
+
+    The store is a HybridSearch over the FAISS index and its BM25 lexical index.
+    Both are saved in `folder` and loaded memory-mapped, so restarts and new
+    sessions never re-embed the corpus and memory does not grow with the number
+    of users. `refresh()` applies added, changed and removed PDFs incrementally
+    and swaps the updated store in; `watch()` runs it from a background thread
+    whenever a scan of the corpus folder sees a difference.
+    """
+
+    def __init__(self, corpus_dir, folder, embeddings):
+        self.corpus_dir = corpus_dir
+        self.folder = folder
+        self.embeddings = embeddings
+        self.lock = threading.RLock()
+        self.version = None
+        self.store = None
+        self.watcher = None
+
+    def _load(self):
+        if os.path.exists(os.path.join(self.folder, chunk_store.INDEX_FILE)):
+            self.store = HybridSearch.from_env(
+                chunk_store.load_local(self.folder, self.embeddings),
+                lexical_index.load_local(self.folder, build_missing=True),
+            )
+            self.version = IndexManifest.load(self.folder).version
+
+    def peek(self):
+        """
+        Return (version, store), loading the saved index on first use; store is None until one is built.
+        """
+        if self.store is None:
+            with self.lock:
+                if self.store is None:
+                    self._load()
+        return self.version, self.store
+
+    def get(self, progress=None):
+        """
+        Return (version, store), indexing the corpus first if no index has been saved yet.
+        """
+        version, store = self.peek()
+        if store is None:
+            self.refresh(progress)
+        return self.version, self.store
+
+    def refresh(self, progress=None):
+        """
+        Apply corpus changes to the saved index and reload it if anything changed.
+        """
+        with self.lock:
+            stats = sync_index(self.corpus_dir, self.folder, self.embeddings, index_factory.index_mode_from_env(), progress)
+            if stats["changed"] or stats["removed"] or self.store is None:
+                self._load()
+        return stats
+
+    def watch(self, interval=None):
+        """
+        Start (once) a daemon thread that refreshes the index when files appear, change or disappear.
+        """
+        interval = watch_interval_from_env() if interval is None else interval
+        with self.lock:
+            if self.watcher is not None or interval <= 0:
+                return
+            self.watcher = threading.Thread(target=self._watch, args=(interval,), name="corpus-watcher", daemon=True)
+            self.watcher.start()
+
+    def _watch(self, interval):
+        seen = None
+        while True:
+            time.sleep(interval)
+            try:
+                files = scan_corpus(self.corpus_dir)
+                if files != seen and self.store is not None:
+                    stats = self.refresh()
+                    if stats["changed"] or stats["removed"]:
+                        logger.info("Corpus index updated: %s", stats)
+                seen = files
+            except Exception:
+                logger.exception("Corpus index refresh failed")
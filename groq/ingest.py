@@ -0,0 +1,173 @@
+import os
+from itertools import groupby
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from common import chunk_store, index_factory, lexical_index
+from common.manifest import IndexManifest, chunk_id, hash_file
+from common.pdf_extraction import iter_pdf_pages
+from common.tracing import timed_iter
+
+
+def batch_limits_from_env():
+    """
+    Return (chunks, bytes) flushed per embedding batch, from INGEST_BATCH_CHUNKS and INGEST_MAX_BUFFER_MB.
+    """
+    return (
+        int(os.getenv("INGEST_BATCH_CHUNKS", "256")),
+        int(float(os.getenv("INGEST_MAX_BUFFER_MB", "16")) * 1024 * 1024),
+    )
+
+
+def scan_corpus(corpus_dir):
+    """
+    Return {relative path: (size, mtime_ns)} for every PDF below a folder, without reading them.
+    """
+    files = {}
+    for root, _, names in os.walk(corpus_dir):
+        for name in names:
+            if name.lower().endswith(".pdf"):
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                files[os.path.relpath(path, corpus_dir)] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def iter_chunks(corpus_dir, names, splitter):
+    """
+    Stream the given PDFs page by page and yield (name, [(chunk id, text, metadata), ...]) per file.
+
+    Pages are split one at a time, like `split_documents` over PyPDFDirectoryLoader
+    pages, so the metadata matches what the groq apps indexed before.
+    """
+    pages = timed_iter("extract", iter_pdf_pages((name, os.path.join(corpus_dir, name)) for name in names))
+    for name, file_pages in groupby(pages, key=lambda page: page[0]):
+        source = os.path.join(corpus_dir, name)
+        chunks = {}
+        page_chunks = ((page_no, chunk) for _, page_no, text in file_pages for chunk in splitter.split_text(text))
+        for page_no, chunk in timed_iter("split", page_chunks):
+            chunks.setdefault(chunk_id(f"{name}#{page_no}", chunk), (chunk, {"source": source, "page": page_no - 1}))
+        yield name, [(id_, text, metadata) for id_, (text, metadata) in chunks.items()]
+
+
+class _Batch:
+    """
+    Chunks waiting to be embedded, flushed into the store once a chunk or byte limit is reached.
+    """
+
+    def __init__(self, folder, embeddings, max_chunks, max_bytes):
+        self.folder = folder
+        self.embeddings = embeddings
+        self.max_chunks = max_chunks
+        self.max_bytes = max_bytes
+        self.store = None
+        self.ids, self.texts, self.metadatas = [], [], []
+        self.size = 0
+        self.added = 0
+
+    def add(self, id_, text, metadata):
+        self.ids.append(id_)
+        self.texts.append(text)
+        self.metadatas.append(metadata)
+        self.size += len(text.encode("utf-8"))
+        if len(self.ids) >= self.max_chunks or self.size >= self.max_bytes:
+            self.flush()
+
+    def flush(self):
+        if not self.ids:
+            return
+        vectors = self.embeddings.embed_documents(self.texts)
+        if self.store is None:
+            self.store = chunk_store.create_local(self.folder, self.embeddings, len(vectors[0]))
+        self.store.add_embeddings(zip(self.texts, vectors), metadatas=self.metadatas, ids=self.ids)
+        self.added += len(self.ids)
+        self.ids, self.texts, self.metadatas = [], [], []
+        self.size = 0
+
+
+def sync_index(corpus_dir, folder, embeddings, mode, progress=None):
+    """
+    Bring the saved index in `folder` in line with the PDFs below `corpus_dir`.
+
+    Files are compared with the manifest by size and mtime, and only those whose
+    content hash changed are re-read. Their pages are streamed, split and embedded
+    in batches bounded by INGEST_BATCH_CHUNKS / INGEST_MAX_BUFFER_MB, and chunk
+    texts go straight to the SQLite chunk store, so memory stays flat apart from
+    the index itself and work grows linearly with the changed pages. Chunks of
+    changed or removed files are deleted, and the index is retrained once at the
+    end if the corpus outgrew it. The BM25 lexical index is then rebuilt from the
+    chunk store. `progress(done, total)` reports files.
+
+    Returns a dict of counts; nothing is written when nothing changed.
+    """
+    manifest = IndexManifest.load(folder)
+    has_index = bool(manifest.files) and os.path.exists(os.path.join(folder, chunk_store.INDEX_FILE))
+    if not has_index:
+        manifest = IndexManifest(folder, version=manifest.version)
+
+    files = scan_corpus(corpus_dir)
+    ids_to_delete = []
+    removed = [name for name in manifest.files if name not in files]
+    for name in removed:
+        ids_to_delete.extend(manifest.chunk_ids(name))
+        manifest.remove_file(name)
+
+    changed, touched = {}, False
+    for name, signature in sorted(files.items()):
+        if manifest.signature(name) == signature:
+            continue
+        file_hash = hash_file(os.path.join(corpus_dir, name))
+        if manifest.file_hash(name) == file_hash:
+            manifest.update_file(name, file_hash, manifest.chunk_ids(name), signature)
+            touched = True
+        else:
+            changed[name] = (file_hash, signature)
+
+    stats = {"files": len(files), "changed": len(changed), "removed": len(removed), "added_chunks": 0, "deleted_chunks": 0}
+    index_path = os.path.join(folder, chunk_store.INDEX_FILE)
+    # A changed FAISS_INDEX_MODE alone still needs the retrain below
+    if not changed and not ids_to_delete and (not has_index or index_factory.saved_matches_mode(index_path, mode)):
+        if touched:
+            manifest.save(bump=False)
+        return stats
+
+    max_chunks, max_bytes = batch_limits_from_env()
+    batch = _Batch(folder, embeddings, max_chunks, max_bytes)
+    if has_index:
+        batch.store = chunk_store.load_local(folder, embeddings, writable=True)
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    done = 0
+    for name, chunks in iter_chunks(corpus_dir, list(changed), splitter):
+        old_ids = set(manifest.chunk_ids(name))
+        ids = [id_ for id_, _, _ in chunks]
+        ids_to_delete.extend(old_ids.difference(ids))
+        for id_, text, metadata in chunks:
+            if id_ not in old_ids:
+                batch.add(id_, text, metadata)
+        file_hash, signature = changed.pop(name)
+        manifest.update_file(name, file_hash, ids, signature)
+        done += 1
+        if progress:
+            progress(done, done + len(changed))
+    batch.flush()
+    # Files without pages yield no chunks at all
+    for name, (file_hash, signature) in changed.items():
+        ids_to_delete.extend(manifest.chunk_ids(name))
+        manifest.update_file(name, file_hash, [], signature)
+
+    store = batch.store
+    if store is not None and ids_to_delete:
+        if not index_factory.supports_removal(store.index):
+            # HNSW and IVF: swap in a flat copy to delete from; it is retrained to `mode` below
+            store = index_factory.retrain(store, embeddings, "flat")
+        store.delete(ids_to_delete)
+    if store is not None and store.index.ntotal and not index_factory.matches_mode(store.index, mode):
+        store = index_factory.retrain(store, embeddings, mode)
+
+    if store is not None:
+        chunk_store.save_local(store, folder)
+        lexical_index.build_local(folder)
+    manifest.save()
+    stats.update(added_chunks=batch.added, deleted_chunks=len(ids_to_delete))
+    return stats
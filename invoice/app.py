@@ -1,9 +1,13 @@
 from dotenv import load_dotenv
 import streamlit as st
 import os
+import sys
 from PIL import Image, UnidentifiedImageError
 import google.generativeai as genai
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.tracing import span, usage_attributes
+
 # Load environment variables
 load_dotenv()
 
@@ -14,7 +18,9 @@ genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 def get_gemini_response(input_text, image, prompt):
     try:
         model = genai.GenerativeModel('gemini-1.5-flash')  # Updated to the supported model
-        response = model.generate_content([input_text, image[0], prompt])
+        with span("llm", model="gemini-1.5-flash", bytes=len(image[0]["data"])) as current:
+            response = model.generate_content([input_text, image[0], prompt])
+            current.set(**usage_attributes(response))
         return response.text
     except Exception as e:
         st.error("An error occurred while fetching the response from the Gemini API.")
@@ -1,9 +1,19 @@
+import math
 import os
 import sqlite3
+import sys
 import streamlit as st
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.sql_guard import GuardedQuery, QueryPolicy, QueryRejected
+from common.sqlite_pool import get_pool
+from common.result_table import ResultTable
+from common.schema_prompt import SchemaPrompt
+from common.tracing import span, usage_attributes
+from common.translation_cache import TranslationCache, schema_fingerprint
+
 # Load environment variables from a .env file
 load_dotenv()
 
@@ -15,39 +25,149 @@ else:
     # Configure Genai with API Key
     genai.configure(api_key=api_key)
 
+# Rows of the result shown per page
+RESULT_PAGE_ROWS = int(os.getenv("SQL_RESULT_PAGE_ROWS", 1000))
+
+# Widgets controlling the result view, reset when a new result arrives
+RESULT_WIDGET_KEYS = ("result_sort_by", "result_descending", "result_filter_by", "result_contains", "result_page")
+
 # Function to get response from Gemini model
 def get_gemini_response(question, prompt):
     try:
         # Use the 'gemini-pro' model to generate content based on the prompt and question
         model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content([prompt[0], question])
+        with span("llm", model="gemini-pro") as current:
+            response = model.generate_content([prompt[0], question])
+            current.set(**usage_attributes(response))
         return response.text.strip()
     except Exception as e:
         st.error(f"Error getting response from Gemini model: {e}")
         return None
 
-# Function to execute SQL query and return results
+@st.cache_resource
+def get_translation_cache():
+    # Shared by all sessions and persisted to disk
+    return TranslationCache.from_env()
+
+@st.cache_resource(max_entries=8)
+def get_schema_prompt(schema, db):
+    # Keyed by the schema fingerprint, so the tables are read again only when the schema changes
+    with get_pool(db).connection() as conn:
+        return SchemaPrompt.from_connection(conn, schema_notes)
+
+# Function to build the prompt for a question, describing only the tables relevant to it
+def build_prompt(question, db):
+    with span("prompt") as current:
+        with get_pool(db).connection() as conn:
+            schema = schema_fingerprint(conn)
+        schema_prompt = get_schema_prompt(schema, db)
+        tables = schema_prompt.select(question)
+        current.set(tables=len(tables))
+        return [prompt_template.format(schema=schema_prompt.render(tables))]
+
+# Function to turn a question into SQL, reusing the SQL generated before for the same question and schema
+def translate_question(question, db):
+    with span("translate") as current:
+        prompt = build_prompt(question, db)
+        # The prompt is part of the key, so SQL written from a different set of tables is not reused
+        with get_pool(db).connection() as conn:
+            fingerprint = schema_fingerprint(conn, prompt[0])
+        cache = get_translation_cache()
+        sql_query = cache.get(fingerprint, question)
+        cached = sql_query is not None
+        current.set(cached=cached)
+        if not cached:
+            sql_query = get_gemini_response(question, prompt)
+        return sql_query, fingerprint, cached
+
+@st.cache_resource
+def get_query_policy():
+    return QueryPolicy.from_env()
+
+# Function to execute SQL query; iterate the result for pages of rows
 def read_sql_query(sql, db):
+    # Runs on a pooled read-only connection, with the plan checked and time and rows capped
+    return GuardedQuery(get_pool(db), sql, get_query_policy())
+
+# Function to read a query's result into columnar form as it is fetched; returns None if the query failed
+def fetch_query_results(query):
     try:
-        # Connect to the SQLite database and execute the query
-        conn = sqlite3.connect(db)
-        cur = conn.cursor()
-        cur.execute(sql)
-        rows = cur.fetchall()
-        conn.close()
-        return rows
-    except sqlite3.Error as e:
+        with span("sql") as current:
+            result = ResultTable.from_query(query)
+            current.set(rows=query.row_count, truncated=query.truncated)
+    except QueryRejected as e:
+        st.error(f"Query rejected: {e}")
+        return None
+    except (sqlite3.Error, OSError) as e:
         st.error(f"SQLite error: {e}")
-        return []
-
-# Define your updated prompt for Gemini model
-prompt = [
-    """
-    You are an expert in converting natural language questions into SQL queries for a database. The database is named 'college.db' and contains a table named 'COLLEGES' with the following columns:
-    - name (TEXT): The name of the college.
-    - courses (TEXT): A list of courses offered by the college.
-    - rating (REAL): The rating of the college.
-    - fee (INTEGER): The fee structure of the college.
+        return None
+    return result
+
+# Callback sending the result view back to its first page when its sorting or filter changes
+def reset_result_page():
+    st.session_state.result_page = 1
+
+# Function to show a result one page at a time, sorted and filtered on the server, with CSV and Parquet downloads
+def show_query_results(result, truncated):
+    st.subheader("Query Results:")
+    if not result.num_rows:
+        st.write("No data found.")
+        return
+    sort_column, filter_column = st.columns(2)
+    sort_by = sort_column.selectbox(
+        "Sort by", [None] + result.columns, format_func=lambda column: column or "Query order", key="result_sort_by",
+        on_change=reset_result_page,
+    )
+    descending = sort_column.checkbox("Descending", key="result_descending", on_change=reset_result_page)
+    filter_by = filter_column.selectbox("Filter on", result.columns, key="result_filter_by", on_change=reset_result_page)
+    contains = filter_column.text_input("Containing", key="result_contains", on_change=reset_result_page)
+
+    with span("render") as current:
+        view = result.view(sort_by, descending, filter_by, contains)
+        pages = max(1, math.ceil(view.num_rows / RESULT_PAGE_ROWS))
+        # A narrower filter can leave fewer pages than the one being shown
+        if st.session_state.get("result_page", 1) > pages:
+            st.session_state.result_page = pages
+        page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key="result_page")
+        start = (page - 1) * RESULT_PAGE_ROWS
+        # Only this page is sent to the browser
+        st.dataframe(view.slice(start, RESULT_PAGE_ROWS), hide_index=True)
+        current.set(rows=max(0, min(RESULT_PAGE_ROWS, view.num_rows - start)))
+
+    if view.num_rows:
+        shown = f"Rows {start + 1:,}-{min(start + RESULT_PAGE_ROWS, view.num_rows):,} of {view.num_rows:,}"
+    else:
+        shown = "No rows match the filter"
+    if view.num_rows != result.num_rows:
+        shown += f" (filtered from {result.num_rows:,})"
+    if truncated:
+        shown += f". The query returned more rows; only the first {result.num_rows:,} were read"
+    st.caption(shown + ".")
+
+    # Files are generated when a button is clicked, from the rows as sorted and filtered
+    csv_column, parquet_column = st.columns(2)
+    csv_column.download_button(
+        "Download CSV", lambda: result.export(view, "csv"), file_name="query_results.csv", mime="text/csv"
+    )
+    parquet_column.download_button(
+        "Download Parquet", lambda: result.export(view, "parquet"), file_name="query_results.parquet",
+        mime="application/vnd.apache.parquet",
+    )
+
+# What the schema alone does not say; added under each table in the generated schema description
+schema_notes = {
+    "COLLEGES": "name is the name of the college, rating its rating and fee its fee structure. courses lists the courses "
+                "offered as free text; do not search this column, use college_courses instead.",
+    "college_courses": "One row per course a college offers. college matches COLLEGES.name, level is the degree level such "
+                       "as 'BTech' or 'Diploma' ('' when none is given), and a course of 'All courses' means the college offers every course.",
+    "course_names": "One row per distinct course name. Find courses by topic by starting FROM course_names and joining "
+                    "college_courses ON college_courses.course = course_names.course, with WHERE course_names MATCH '\"words\"'.",
+}
+
+# Define your updated prompt for Gemini model; {schema} is replaced with the tables relevant to the question
+prompt_template = """
+    You are an expert in converting natural language questions into SQL queries for a SQLite database. The database is named 'college.db' and contains:
+{schema}
 
     Handle various types of queries as follows:
     1. Basic Queries: Convert straightforward questions into SQL.
@@ -63,11 +183,13 @@ prompt = [
       SELECT name FROM COLLEGES WHERE rating > 4.0;
 
     - "Find the cheapest college with computer science?" should be converted to:
-      SELECT name FROM COLLEGES WHERE courses LIKE "%Computer Science%" ORDER BY fee ASC LIMIT 1;
+      SELECT c.name FROM course_names n JOIN college_courses cc ON cc.course = n.course JOIN COLLEGES c ON c.name = cc.college WHERE course_names MATCH '"computer science"' ORDER BY c.fee ASC LIMIT 1;
+
+    - "Which colleges offer a diploma in civil engineering?" should be converted to:
+      SELECT DISTINCT college FROM college_courses WHERE level = 'Diploma' AND course = 'Civil Engineering';
 
     Ensure that the SQL query does not include any delimiters like ``` and does not use the word 'SQL' in the output.
     """
-]
 
 # Streamlit App Interface
 st.set_page_config(page_title="Gemini SQL Query App", layout="wide")
@@ -76,47 +198,50 @@ st.header("Chatbot Q & A Session")
 question = st.text_input("Enter your question about the college database:", key="input")
 submit = st.button("Ask the question")
 
-# Use session_state to track if the query has been processed
-if 'sql_query_generated' not in st.session_state:
-    st.session_state.sql_query_generated = False
-
 # Handle user input and submission
 if submit:
     if question:
-        # Generate SQL query only if it's not already done
-        if not st.session_state.sql_query_generated:
-            # Get the SQL query from Gemini
-            sql_query = get_gemini_response(question, prompt)
-
-            # If a valid SQL query was returned, execute it
-            if sql_query:
-                st.session_state.sql_query = sql_query  # Save the query in session state
-                st.session_state.sql_query_generated = True  # Mark the query as generated
-                st.write(f"Generated SQL Query: {sql_query}")  # Display the generated SQL query for debugging
-
-                # Retrieve data from database
-                try:
-                    response = read_sql_query(sql_query, "college.db")
-
-                    # Display query results
-                    st.subheader("Query Results:")
-                    if response:
-                        for row in response:
-                            st.write(row)
-                    else:
-                        st.write("No data found or invalid query.")
-                except Exception as e:
-                    st.error(f"An error occurred while executing the query: {e}")
-        else:
-            # If the SQL query was already generated, just display the results
-            st.write(f"Generated SQL Query: {st.session_state.sql_query}")
-            st.subheader("Query Results:")
-            response = read_sql_query(st.session_state.sql_query, "college.db")
-            if response:
-                for row in response:
-                    st.write(row)
-            else:
-                st.write("No data found or invalid query.")
+        st.session_state.pop("query_result", None)
+        try:
+            # Get the SQL query from the translation cache, or from Gemini on a miss
+            sql_query, fingerprint, cached = translate_question(question, "college.db")
+        except Exception as e:
+            st.error(f"An error occurred while preparing the query: {e}")
+            sql_query = None
+
+        # If a valid SQL query was returned, execute it
+        if sql_query:
+            st.write(f"Generated SQL Query: {sql_query}")  # Display the generated SQL query for debugging
+
+            # Retrieve the result once; paging, sorting and filtering reuse it on later reruns
+            try:
+                query = read_sql_query(sql_query, "college.db")
+                result = fetch_query_results(query)
+
+                if result is not None:
+                    # A new result starts on its first page, in query order and unfiltered
+                    for key in RESULT_WIDGET_KEYS:
+                        st.session_state.pop(key, None)
+                    st.session_state.query_result = (sql_query, result, query.truncated)
+
+                    # Only SQL that ran is cached, so a bad translation is generated again next time
+                    if not cached:
+                        get_translation_cache().put(fingerprint, question, sql_query)
+            except Exception as e:
+                st.error(f"An error occurred while executing the query: {e}")
     else:
         st.warning("Please enter a question.")
 
+# The last result stays on the page while it is paged, sorted, filtered and downloaded
+if "query_result" in st.session_state:
+    sql_query, result, truncated = st.session_state.query_result
+    if not submit:
+        st.write(f"Generated SQL Query: {sql_query}")
+    show_query_results(result, truncated)
+
+cache_stats = get_translation_cache().stats()
+st.sidebar.caption(
+    f"SQL translation cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+    f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['entries']} entries."
+)
+
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import index_factory
+from common.embedding_engine import FakeEmbeddings
+from common.hybrid_search import HybridSearch
+from common.lexical_index import LexicalIndex
+
+CHUNKS = 2000
+
+
+def text(i):
+    return f"doc number {i} token{i} marker{i * 7919 % 104729}"
+
+
+def hybrid_search(mode):
+    embeddings = FakeEmbeddings(size=64)
+    texts = [text(i) for i in range(CHUNKS)]
+    store = index_factory.from_texts(texts, embeddings, mode, ids=[str(i) for i in range(CHUNKS)])
+    embeddings.calls = 0
+    return HybridSearch(store, LexicalIndex.build(texts))
+
+
+@pytest.mark.parametrize("mode", ["flat", "hnsw"])
+def test_fast_path_fills_k_chunks_without_embedding(mode):
+    hybrid = hybrid_search(mode)
+    documents, embedded = hybrid.search("token1234", k=4)
+
+    assert not embedded and hybrid.embeddings.calls == 0
+    assert len(documents) == 4
+    assert documents[0].page_content == text(1234)
+    assert len({document.page_content for document in documents}) == 4
+
+
+def test_ivf_index_without_stored_vectors_embeds_the_query():
+    hybrid = hybrid_search("ivf")
+    documents, embedded = hybrid.search("token1234", k=4)
+
+    assert embedded
+    assert len(documents) == 4
+    assert documents[0].page_content == text(1234)
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import faiss
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import index_factory
+from common.embedding_engine import FakeEmbeddings
+
+# Enough chunks to train the IVF modes; the PQ modes fall back to flat below 10000
+CHUNKS = 2000
+
+
+def text(i):
+    return f"doc number {i} token{i} marker{i * 7919 % 104729}"
+
+
+def delete(store, embeddings, mode, ids):
+    # The same choice chatpdf's get_vector_store makes
+    if index_factory.supports_removal(store.index):
+        store.delete(ids)
+        return store
+    return index_factory.rebuild(store, embeddings, mode, exclude_ids=ids)
+
+
+@pytest.mark.parametrize("mode", index_factory.INDEX_MODES)
+def test_search_after_delete_returns_the_right_chunk(mode):
+    embeddings = FakeEmbeddings(size=64)
+    ids = [str(i) for i in range(CHUNKS)]
+    store = index_factory.from_texts([text(i) for i in range(CHUNKS)], embeddings, mode, ids=ids)
+    store = delete(store, embeddings, mode, ids[:500])
+
+    assert store.index.ntotal == CHUNKS - 500
+    for i in (500, 1000, 1500, CHUNKS - 1):
+        assert store.similarity_search(text(i), k=1)[0].page_content == text(i)
+    assert all(doc.page_content != text(10) for doc in store.similarity_search(text(10), k=4))
+
+    store.add_texts([text(CHUNKS)], ids=[str(CHUNKS)])
+    assert store.similarity_search(text(CHUNKS), k=1)[0].page_content == text(CHUNKS)
+    assert store.similarity_search(text(1500), k=1)[0].page_content == text(1500)
+
+
+@pytest.mark.parametrize("description, removable", [
+    ("Flat", True), ("SQ8", True), ("PQ8", True), ("HNSW32", False),
+    ("IVF16,Flat", False), ("IVF16,SQ8", False), ("IVF16,PQ8", False),
+])
+def test_supports_removal(description, removable):
+    assert index_factory.supports_removal(faiss.index_factory(32, description)) is removable
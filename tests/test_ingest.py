@@ -0,0 +1,49 @@
+import os
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "groq"))
+
+from benchmarks.pdf_extraction import make_pdf
+from common import chunk_store, index_factory
+from common.embedding_engine import FakeEmbeddings
+from ingest import sync_index
+
+
+def check_search(folder, embeddings, sources):
+    store = chunk_store.load_local(folder, embeddings)
+    try:
+        assert index_factory.matches_mode(store.index, "ivf")
+        docs = [store.docstore.search(id_) for id_ in store.index_to_docstore_id.values()]
+        assert {os.path.basename(doc.metadata["source"]) for doc in docs} == sources
+        for doc in docs[::25]:
+            # The synthetic files share their pages, so a chunk has a twin in every file
+            found = store.similarity_search(doc.page_content, k=8)
+            assert (doc.page_content, doc.metadata) in [(hit.page_content, hit.metadata) for hit in found]
+    finally:
+        chunk_store.close(store)
+
+
+def test_incremental_delete_from_ivf_index(tmp_path):
+    corpus, folder = tmp_path / "corpus", str(tmp_path / "index")
+    corpus.mkdir()
+    # Enough chunks that the IVF index is still trained after one file goes
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        make_pdf(str(corpus / name), 110)
+    embeddings = FakeEmbeddings(size=1024)
+
+    stats = sync_index(str(corpus), folder, embeddings, "ivf")
+    assert stats["added_chunks"] >= 1500
+    check_search(folder, embeddings, {"a.pdf", "b.pdf", "c.pdf"})
+
+    os.remove(corpus / "b.pdf")
+    stats = sync_index(str(corpus), folder, embeddings, "ivf")
+    assert stats["removed"] == 1 and stats["deleted_chunks"]
+    check_search(folder, embeddings, {"a.pdf", "c.pdf"})
+
+    shutil.copy(corpus / "a.pdf", corpus / "b.pdf")
+    stats = sync_index(str(corpus), folder, embeddings, "ivf")
+    assert stats["changed"] == 1 and stats["added_chunks"]
+    check_search(folder, embeddings, {"a.pdf", "b.pdf", "c.pdf"})
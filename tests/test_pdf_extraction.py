@@ -0,0 +1,38 @@
+import os
+import random
+import sys
+
+import pytest
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.pdf_extraction import iter_text_chunks
+
+WORDS = "alpha beta gamma delta eps zeta eta theta iota kappa".split()
+
+
+def make_pages(seed, max_words):
+    rng = random.Random(seed)
+    pages = []
+    for _ in range(rng.randint(5, 60)):
+        lines = [" ".join(rng.choices(WORDS, k=rng.randint(1, max_words))) for _ in range(rng.randint(1, 40))]
+        # Pages may end mid-word, in spaces or in a line break, as PyPDF2 returns them
+        pages.append(rng.choice(["\n", "\n "]).join(lines) + rng.choice(["", " ", "\n", "  \n "]))
+    return pages
+
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap, flush_size", [
+    (10000, 1000, 50000),
+    (1000, 100, 3000),
+    (300, 50, 500),
+    (500, 0, 100),
+    (200, 150, 250),
+])
+@pytest.mark.parametrize("max_words", [20, 120])
+@pytest.mark.parametrize("seed", range(10))
+def test_iter_text_chunks_matches_whole_text_split(seed, max_words, chunk_size, chunk_overlap, flush_size):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    pages = make_pages(seed, max_words)
+    chunks = list(iter_text_chunks(pages, splitter, flush_size=flush_size))
+    assert chunks == splitter.split_text("".join(pages))
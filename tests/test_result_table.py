@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.result_table import ResultTable
+
+
+class Query:
+    """
+    Stand-in for a GuardedQuery: pages of rows plus the column names.
+    """
+
+    def __init__(self, columns, pages):
+        self.columns = columns
+        self.pages = pages
+
+    def __iter__(self):
+        return iter(self.pages)
+
+
+def test_filter_on_blob_column_with_invalid_utf8():
+    rows = [(1, b"\xff\xfeLogo"), (2, None), (3, b"plain")]
+    result = ResultTable.from_query(Query(["id", "image"], [rows[:2], rows[2:]]))
+
+    assert result.view(filter_column="image", contains="logo")["id"].to_pylist() == [1]
+    assert result.view(filter_column="image", contains="PLAIN")["id"].to_pylist() == [3]
+    assert result.view(filter_column="id", contains="2")["id"].to_pylist() == [2]
@@ -1,9 +1,13 @@
 import streamlit as st
 from dotenv import load_dotenv
 import os
+import sys
 import google.generativeai as genai
 from youtube_transcript_api import YouTubeTranscriptApi
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.tracing import count_tokens, span, usage_attributes
+
 # Load environment variables
 load_dotenv()  # Load environment variables from a .env file
 
@@ -28,12 +32,14 @@ def extract_transcript_details(youtube_video_url):
         video_id = youtube_video_url.split("=")[1]  # Extract video ID from the URL
         # print(video_id)
         # Fetch the transcript using the video ID
-        transcript_text = YouTubeTranscriptApi.get_transcript(video_id)
+        with span("extract") as current:
+            transcript_text = YouTubeTranscriptApi.get_transcript(video_id)
 
-        # Combine all text segments into one string
-        transcript = ""
-        for segment in transcript_text:
-            transcript += " " + segment["text"]
+            # Combine all text segments into one string
+            transcript = ""
+            for segment in transcript_text:
+                transcript += " " + segment["text"]
+            current.set(chars=len(transcript), tokens=count_tokens(transcript))
 
         return transcript
 
@@ -45,7 +51,9 @@ def extract_transcript_details(youtube_video_url):
 def generate_gemini_content(transcript_text, prompt):
     try:
         model = genai.GenerativeModel("gemini-pro")
-        response = model.generate_content(prompt + transcript_text)
+        with span("llm", model="gemini-pro") as current:
+            response = model.generate_content(prompt + transcript_text)
+            current.set(**usage_attributes(response))
         return response.text
     except Exception as e:
         st.error(f"Error generating summary: {e}")